@@ -0,0 +1,36 @@
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.alert import Alert
+
+logger = logging.getLogger(__name__)
+
+
+async def broadcast_alert(
+    db: AsyncSession,
+    tipo: str,
+    titulo: str,
+    mensagem: str | None = None,
+    dados: dict | None = None,
+) -> Alert:
+    """Cria um alerta geral (sem profile_slug), visto por todos os perfis.
+
+    Uma linha só, qualquer que seja o número de perfis; quem já leu fica em
+    alert_leituras. Roda na transação do chamador (quem chama faz o commit).
+    """
+    alert = Alert(tipo=tipo, titulo=titulo, mensagem=mensagem, dados_json=dados or {})
+    db.add(alert)
+    await db.flush()
+    return alert
+
+
+async def broadcast_alert_later(**kwargs) -> None:
+    """Versão para BackgroundTasks: abre a própria sessão depois da resposta."""
+    try:
+        async with async_session() as db:
+            await broadcast_alert(db, **kwargs)
+            await db.commit()
+    except Exception:
+        logger.exception("Falha ao distribuir alerta %r", kwargs.get("titulo"))
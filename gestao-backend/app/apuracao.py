@@ -0,0 +1,224 @@
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.bulk import BULK_BATCH_SIZE
+
+from app.models.enquete import Enquete
+from app.models.enquete_resposta import EnqueteResposta
+from app.models.enquete_voto import EnqueteVoto
+from app.models.sync_state import SyncState
+
+STATUS_ENCERRADA = ("encerrada", "implementada", "arquivada")
+
+
+@dataclass
+class Apuracao:
+    """Votos de uma enquete derivados de enquete_votos.
+
+    Substitui as colunas JSON votos/votantes, que ficaram só como legado.
+    """
+
+    votos: dict[str, int] = field(default_factory=dict)
+    votantes: dict[str, list[int]] = field(default_factory=dict)
+    votantes_count: int = 0
+    # texto livre por bolinha (enquete de texto e melhoria da escala)
+    respostas: dict[str, str] = field(default_factory=dict)
+    # resultado congelado no encerramento (quorum/aprovação), se houver
+    congelado: dict | None = None
+
+
+async def apurar(
+    db: AsyncSession, enquetes: list[Enquete], com_votantes: bool = True
+) -> dict[str, Apuracao]:
+    """Apura várias enquetes de uma vez.
+
+    Com com_votantes=False não monta o mapa por bolinha nem as respostas
+    (visão resumo).
+    """
+    apuracoes = {
+        e.id: Apuracao(votos={str(i): 0 for i in range(len(e.opcoes or []))})
+        for e in enquetes
+    }
+    # encerradas servem o resultado congelado, sem consultar enquete_votos
+    for e in enquetes:
+        if is_frozen(e):
+            apuracoes[e.id] = from_snapshot(e.resultado)
+    if com_votantes:
+        result = await db.execute(
+            select(EnqueteResposta.enquete_id, EnqueteResposta.cota_slug, EnqueteResposta.texto)
+            .where(EnqueteResposta.enquete_id.in_(list(apuracoes)))
+            .order_by(EnqueteResposta.created_at)
+        )
+        for enquete_id, cota_slug, texto in result:
+            apuracoes[enquete_id].respostas[cota_slug] = texto
+    enquetes = [e for e in enquetes if not is_frozen(e)]
+    ids = [e.id for e in enquetes]
+    if not ids:
+        return apuracoes
+
+    counts = await db.execute(
+        select(EnqueteVoto.enquete_id, EnqueteVoto.opcao_index, func.count())
+        .where(EnqueteVoto.enquete_id.in_(ids))
+        .group_by(EnqueteVoto.enquete_id, EnqueteVoto.opcao_index)
+    )
+    for enquete_id, opcao_index, total in counts:
+        apuracoes[enquete_id].votos[str(opcao_index)] = total
+
+    texto_ids = [e.id for e in enquetes if e.tipo == "texto"]
+    if com_votantes:
+        voters = await db.execute(
+            select(EnqueteVoto.enquete_id, EnqueteVoto.cota_slug, EnqueteVoto.opcao_index)
+            .where(EnqueteVoto.enquete_id.in_(ids))
+            .order_by(EnqueteVoto.created_at)
+        )
+        for enquete_id, cota_slug, opcao_index in voters:
+            apuracoes[enquete_id].votantes.setdefault(cota_slug, []).append(opcao_index)
+        for e in enquetes:
+            apuracoes[e.id].votantes_count = len(apuracoes[e.id].votantes)
+        respostas = ((i, len(apuracoes[i].respostas)) for i in texto_ids)
+    else:
+        voters = await db.execute(
+            select(EnqueteVoto.enquete_id, func.count(func.distinct(EnqueteVoto.cota_slug)))
+            .where(EnqueteVoto.enquete_id.in_(ids))
+            .group_by(EnqueteVoto.enquete_id)
+        )
+        for enquete_id, total in voters:
+            apuracoes[enquete_id].votantes_count = total
+        respostas = []
+        if texto_ids:
+            respostas = await db.execute(
+                select(EnqueteResposta.enquete_id, func.count())
+                .where(EnqueteResposta.enquete_id.in_(texto_ids))
+                .group_by(EnqueteResposta.enquete_id)
+            )
+
+    # enquetes de texto: o quórum conta bolinhas que responderam
+    for enquete_id, total in respostas:
+        apuracoes[enquete_id].votantes_count = total
+    return apuracoes
+
+
+def compute_result(enquete: Enquete, apuracao: Apuracao, active_cotas: int) -> dict:
+    votantes_count = apuracao.votantes_count
+    quorum_percent = round((votantes_count / active_cotas) * 100) if active_cotas > 0 else 0
+    quorum_met = quorum_percent >= enquete.quorum_required
+
+    approval_percent: int | None = None
+    approved: bool | None = None
+
+    votos = apuracao.votos
+
+    if enquete.tipo == "binaria":
+        sim = int(votos.get("0", 0))
+        nao = int(votos.get("1", 0))
+        validos = sim + nao
+        if validos > 0:
+            approval_percent = round((sim / validos) * 100)
+        else:
+            approval_percent = 0
+        approved = quorum_met and approval_percent >= enquete.approval_threshold
+    elif enquete.status in STATUS_ENCERRADA:
+        # for multipla: any voting counts as "approved" if quorum met
+        approved = quorum_met
+
+    return {
+        "quorum_percent": quorum_percent,
+        "quorum_met": quorum_met,
+        "approval_percent": approval_percent,
+        "approved": approved,
+    }
+
+
+def snapshot(enquete: Enquete, apuracao: Apuracao, active_cotas: int) -> dict:
+    """Resultado congelado gravado em Enquete.resultado no encerramento."""
+    return {
+        "votos": apuracao.votos,
+        "votantes": apuracao.votantes,
+        "votantes_count": apuracao.votantes_count,
+        "active_cotas": active_cotas,
+        **compute_result(enquete, apuracao, active_cotas),
+        "encerrada_em": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def is_frozen(enquete: Enquete) -> bool:
+    return enquete.status in STATUS_ENCERRADA and bool(enquete.resultado)
+
+
+def from_snapshot(resultado: dict) -> Apuracao:
+    return Apuracao(
+        votos=dict(resultado.get("votos", {})),
+        votantes=dict(resultado.get("votantes", {})),
+        votantes_count=resultado.get("votantes_count", 0),
+        congelado={
+            k: resultado.get(k)
+            for k in ("quorum_percent", "quorum_met", "approval_percent", "approved")
+        },
+    )
+
+
+def _votos_legado(enquete_id: str, tipo: str, multipla_escolha: bool, votantes: dict | None) -> list[dict]:
+    escolha_unica = tipo == "binaria" or not multipla_escolha
+    rows = []
+    for cota_slug, opcoes in (votantes or {}).items():
+        if isinstance(opcoes, int):
+            opcoes = [opcoes]
+        for opcao_index in (opcoes or [])[: 1 if escolha_unica else None]:
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "enquete_id": enquete_id,
+                "cota_slug": cota_slug,
+                "opcao_index": int(opcao_index),
+                "escolha_unica": escolha_unica,
+                "created_at": datetime.now(timezone.utc),
+            })
+    return rows
+
+
+_MARCA_LEGADO = "enquetes_legado"
+
+
+async def migrar_votos_legado(conn: AsyncConnection, forcar: bool = False) -> int:
+    """Copia votos e respostas das colunas JSON (enquetes.votantes e
+    enquetes.respostas) para enquete_votos e enquete_respostas.
+
+    Roda uma vez: depois da cópia grava a marca em sync_state e o lifespan
+    não varre mais as enquetes. Com `forcar` (script migrar_votos.py) copia
+    de novo; o que já foi copiado esbarra nas constraints UNIQUE e é ignorado.
+    Retorna quantos votos foram copiados.
+    """
+    marca = await conn.execute(select(SyncState.fonte).where(SyncState.fonte == _MARCA_LEGADO))
+    if marca.first() and not forcar:
+        return 0
+    insert = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+    result = await conn.execute(
+        select(Enquete.id, Enquete.tipo, Enquete.multipla_escolha, Enquete.votantes, Enquete.respostas)
+    )
+    votos, respostas = [], []
+    for enquete_id, tipo, multipla_escolha, votantes, textos in result.all():
+        votos += _votos_legado(enquete_id, tipo, multipla_escolha, votantes)
+        respostas += [
+            {"id": str(uuid.uuid4()), "enquete_id": enquete_id, "cota_slug": cota_slug,
+             "texto": texto, "created_at": datetime.now(timezone.utc)}
+            for cota_slug, texto in (textos or {}).items() if texto
+        ]
+    copiados = 0
+    for model, rows in ((EnqueteVoto, votos), (EnqueteResposta, respostas)):
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            res = await conn.execute(
+                insert(model).values(rows[start:start + BULK_BATCH_SIZE]).on_conflict_do_nothing()
+            )
+            if model is EnqueteVoto:
+                copiados += res.rowcount or 0
+    await conn.execute(
+        insert(SyncState)
+        .values(fonte=_MARCA_LEGADO, row_hashes={}, synced_at=datetime.now(timezone.utc))
+        .on_conflict_do_nothing()
+    )
+    return copiados
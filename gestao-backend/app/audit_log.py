@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.bulk import insert_many
+from app.database import async_session
+from app.log_rollups import apply_rollups
+from app.models.log import Log
+
+# "async" junta os registros em memória e grava em lote; "sync" grava cada um
+# na hora, em sessão própria (testes/dev)
+AUDIT_LOG_MODE = os.getenv("AUDIT_LOG_MODE", "async")
+AUDIT_LOG_BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "200"))
+AUDIT_LOG_FLUSH_SECONDS = float(os.getenv("AUDIT_LOG_FLUSH_SECONDS", "2"))
+# se o banco ficar fora por muito tempo, descarta os mais antigos acima disso
+AUDIT_LOG_MAX_BUFFER = int(os.getenv("AUDIT_LOG_MAX_BUFFER", "10000"))
+# depois de tantas falhas seguidas do lote, grava linha a linha para isolar
+# a linha ruim em vez de travar a fila inteira
+AUDIT_LOG_MAX_RETRIES = int(os.getenv("AUDIT_LOG_MAX_RETRIES", "3"))
+
+# banco fora do ar / conexão caiu: vale tentar de novo, a linha não tem culpa
+_TRANSITORIOS = (OperationalError, InterfaceError)
+
+_COLUNAS = Log.__table__.columns.keys()
+
+logger = logging.getLogger(__name__)
+
+
+def make_row(**fields) -> dict:
+    """Linha completa de `logs`, com id e timestamp do momento do evento."""
+    unknown = set(fields) - set(_COLUNAS)
+    if unknown:
+        raise TypeError(f"Campos desconhecidos em Log: {sorted(unknown)}")
+    row = dict.fromkeys(_COLUNAS)
+    row["id"] = str(uuid.uuid4())
+    row["timestamp"] = datetime.now(timezone.utc)
+    row["fotos_evidencia"] = []
+    row.update({k: v for k, v in fields.items() if v is not None})
+    return row
+
+
+class AuditLogWriter:
+    """Fila em memória dos Logs de auditoria, gravada em INSERTs multi-linha.
+
+    Os handlers chamam `record()` depois do commit; o worker grava quando o
+    lote enche ou a cada AUDIT_LOG_FLUSH_SECONDS, e o `stop()` do lifespan
+    esvazia a fila antes de a máquina desligar.
+    """
+
+    def __init__(self, mode: str = AUDIT_LOG_MODE, session_factory: async_sessionmaker = async_session):
+        self.mode = mode
+        self.session_factory = session_factory
+        self._buffer: list[dict] = []
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+        self._falhas_seguidas = 0
+        self._stats = {"written": 0, "batches": 0, "failed": 0, "dropped": 0, "dead_letter": 0}
+
+    def start(self) -> None:
+        if self.mode == "sync":
+            return
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Logs de auditoria perdidos no desligamento: %d", len(self._buffer))
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    async def record(self, **fields) -> dict:
+        """Enfileira um Log e devolve a linha (com id e timestamp).
+
+        Nunca levanta por falha de gravação: o handler já fez o commit dele, e
+        a linha fica na fila para a próxima tentativa.
+        """
+        row = make_row(**fields)
+        self._buffer.append(row)
+        if len(self._buffer) > AUDIT_LOG_MAX_BUFFER:
+            excesso = len(self._buffer) - AUDIT_LOG_MAX_BUFFER
+            del self._buffer[:excesso]
+            self._stats["dropped"] += excesso
+        if self.mode == "sync":
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Falha ao gravar %d logs de auditoria", len(self._buffer))
+        elif len(self._buffer) >= AUDIT_LOG_BATCH_SIZE:
+            self.wake()
+        return row
+
+    async def flush(self) -> int:
+        """Grava tudo o que está na fila. Retorna quantos Logs foram gravados."""
+        async with self._lock:
+            rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            try:
+                await self._gravar(rows)
+            except Exception:
+                self._stats["failed"] += 1
+                self._falhas_seguidas += 1
+                if self._falhas_seguidas < AUDIT_LOG_MAX_RETRIES:
+                    # devolve para a frente da fila; tenta de novo no próximo ciclo
+                    self._buffer[:0] = rows
+                    raise
+                return await self._gravar_um_a_um(rows)
+            self._falhas_seguidas = 0
+            self._stats["written"] += len(rows)
+            self._stats["batches"] += 1
+            return len(rows)
+
+    async def _gravar(self, rows: list[dict]) -> None:
+        async with self.session_factory() as db:
+            await insert_many(db, Log, rows, AUDIT_LOG_BATCH_SIZE)
+            await apply_rollups(db, rows)
+            await db.commit()
+
+    async def _gravar_um_a_um(self, rows: list[dict]) -> int:
+        """Uma transação por linha; a que falhar por conta própria é descartada
+        (vai inteira para o log de erro). Falha transitória do banco interrompe
+        e devolve o resto para a fila."""
+        gravados = 0
+        for i, row in enumerate(rows):
+            try:
+                await self._gravar([row])
+            except _TRANSITORIOS:
+                self._buffer[:0] = rows[i:]
+                self._stats["written"] += gravados
+                raise
+            except Exception:
+                logger.exception("Log de auditoria descartado: %r", row)
+                self._stats["dead_letter"] += 1
+                continue
+            gravados += 1
+        self._falhas_seguidas = 0
+        self._stats["written"] += gravados
+        return gravados
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "mode": self.mode,
+            "pending": len(self._buffer),
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Falha ao gravar %d logs de auditoria", len(self._buffer))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=AUDIT_LOG_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+audit_log = AuditLogWriter()
@@ -0,0 +1,77 @@
+import os
+from collections.abc import Iterable
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Linhas por INSERT; ~15 colunas x 200 fica longe do limite de parâmetros
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "200"))
+
+
+def dialect_insert(db: AsyncSession):
+    """insert() com ON CONFLICT do dialeto em uso (Postgres ou SQLite)."""
+    return pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+
+
+def _batches(rows: list[dict], size: int) -> Iterable[list[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def upsert(
+    db: AsyncSession,
+    model,
+    rows: list[dict],
+    key: list[str],
+    update: list[str],
+    batch_size: int = BULK_BATCH_SIZE,
+    increment: list[str] = (),
+) -> None:
+    """INSERT ... ON CONFLICT (key) DO UPDATE SET update, em lotes.
+
+    Colunas em `increment` somam o valor novo ao existente (contadores).
+    Todas as linhas precisam ter as mesmas chaves. Quem chama faz o commit.
+    """
+    insert = dialect_insert(db)
+    table = model.__table__
+    for batch in _batches(rows, batch_size):
+        stmt = insert(model).values(batch)
+        set_ = {col: stmt.excluded[col] for col in update}
+        set_.update({col: table.c[col] + stmt.excluded[col] for col in increment})
+        stmt = stmt.on_conflict_do_update(index_elements=key, set_=set_)
+        await db.execute(stmt)
+
+
+async def insert_ignore(
+    db: AsyncSession,
+    model,
+    rows: list[dict],
+    key: list[str],
+    batch_size: int = BULK_BATCH_SIZE,
+) -> set[tuple]:
+    """INSERT ... ON CONFLICT (key) DO NOTHING, em lotes.
+
+    Retorna as chaves das linhas que foram de fato inseridas. Quem chama faz
+    o commit.
+    """
+    insert = dialect_insert(db)
+    columns = [model.__table__.c[col] for col in key]
+    inserted = set()
+    for batch in _batches(rows, batch_size):
+        stmt = insert(model).values(batch).on_conflict_do_nothing(index_elements=key)
+        result = await db.execute(stmt.returning(*columns))
+        inserted.update(tuple(r) for r in result.all())
+    return inserted
+
+
+async def insert_many(
+    db: AsyncSession,
+    model,
+    rows: list[dict],
+    batch_size: int = BULK_BATCH_SIZE,
+) -> None:
+    """INSERT multi-linha em lotes. Todas as linhas com as mesmas chaves."""
+    insert = dialect_insert(db)
+    for batch in _batches(rows, batch_size):
+        await db.execute(insert(model).values(batch))
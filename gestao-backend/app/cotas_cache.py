@@ -0,0 +1,32 @@
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.cota import Cota
+
+# O cadastro de bolinhas muda poucas vezes por ano; o router de cotas invalida
+# a cada escrita e o TTL só cobre escritas feitas fora deste processo.
+CACHE_TTL = 600  # 10 minutos
+
+_cache: dict = {"ativas": None, "ts": 0.0}
+
+
+async def active_cotas(db: AsyncSession) -> frozenset[str]:
+    """Slugs das cotas ativas (o universo do quórum das enquetes)."""
+    now = time.time()
+    if _cache["ativas"] is not None and now - _cache["ts"] < CACHE_TTL:
+        return _cache["ativas"]
+    result = await db.execute(select(Cota.slug).where(Cota.ativo == True))
+    _cache["ativas"] = frozenset(result.scalars().all())
+    _cache["ts"] = now
+    return _cache["ativas"]
+
+
+async def active_cotas_count(db: AsyncSession) -> int:
+    return len(await active_cotas(db)) or 1
+
+
+def invalidate() -> None:
+    _cache["ativas"] = None
+    _cache["ts"] = 0.0
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import os
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.alert_fanout import broadcast_alert
+from app.apuracao import apurar, snapshot
+from app.cotas_cache import active_cotas_count
+from app.database import async_session
+from app.enquete_stream import enquete_broker
+from app.models.enquete import Enquete
+from app.pagination import as_utc, utcnow
+
+# Teto da espera entre verificações; cobre datas alteradas fora deste processo
+ENQUETE_SCHEDULER_MAX_SLEEP = float(os.getenv("ENQUETE_SCHEDULER_MAX_SLEEP", "300"))
+
+STATUS_ABERTA = ("aberta", "votacao")
+
+logger = logging.getLogger(__name__)
+
+
+async def freeze_result(db: AsyncSession, enquetes: list[Enquete]) -> None:
+    """Grava o resultado de enquetes que acabaram de ser encerradas."""
+    if not enquetes:
+        return
+    active_cotas = await active_cotas_count(db)
+    apuracoes = await apurar(db, enquetes)
+    for e in enquetes:
+        e.resultado = snapshot(e, apuracoes[e.id], active_cotas)
+
+
+class EnqueteScheduler:
+    """Abre a votação em voting_starts_at e encerra em closes_at.
+
+    Dorme até o próximo horário devido (consultado pelos índices de
+    status+data), ou até wake() quando uma enquete é criada/editada.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker = async_session):
+        self.session_factory = session_factory
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+        self._stats = {"abertas": 0, "encerradas": 0, "ticks": 0}
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            # limpa antes do tick para não perder um wake() feito durante ele
+            self._wake.clear()
+            timeout = ENQUETE_SCHEDULER_MAX_SLEEP
+            try:
+                await self.tick()
+                timeout = await self._seconds_until_next()
+            except Exception:
+                logger.exception("Falha no agendador de enquetes")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _seconds_until_next(self) -> float:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(
+                    select(func.min(Enquete.voting_starts_at))
+                    .where(Enquete.status == "aberta")
+                    .scalar_subquery(),
+                    select(func.min(Enquete.closes_at))
+                    .where(Enquete.status.in_(STATUS_ABERTA))
+                    .scalar_subquery(),
+                )
+            )
+            proximos = [as_utc(d) for d in result.one() if d is not None]
+        if not proximos:
+            return ENQUETE_SCHEDULER_MAX_SLEEP
+        wait = (min(proximos) - utcnow()).total_seconds()
+        return min(max(wait, 0.0), ENQUETE_SCHEDULER_MAX_SLEEP)
+
+    async def tick(self) -> tuple[int, int]:
+        """Aplica as transições vencidas. Retorna (abertas, encerradas)."""
+        self._stats["ticks"] += 1
+        async with self.session_factory() as db:
+            now = utcnow()
+            result = await db.execute(
+                select(Enquete)
+                .where(Enquete.status.in_(STATUS_ABERTA), Enquete.closes_at <= now)
+                .with_for_update(skip_locked=True)
+            )
+            fechar = list(result.scalars().all())
+            result = await db.execute(
+                select(Enquete)
+                .where(
+                    Enquete.status == "aberta",
+                    Enquete.voting_starts_at <= now,
+                    Enquete.id.not_in([e.id for e in fechar]),
+                )
+                .with_for_update(skip_locked=True)
+            )
+            abrir = list(result.scalars().all())
+            if not fechar and not abrir:
+                return 0, 0
+
+            for e in abrir:
+                e.status = "votacao"
+                await broadcast_alert(
+                    db,
+                    tipo="enquete",
+                    titulo=f"Votação aberta: {e.titulo}",
+                    mensagem="A votação desta enquete começou.",
+                )
+            for e in fechar:
+                e.status = "encerrada"
+            await freeze_result(db, fechar)
+            for e in fechar:
+                await broadcast_alert(
+                    db,
+                    tipo="enquete",
+                    titulo=f"Enquete encerrada: {e.titulo}",
+                    mensagem=_resumo(e.resultado),
+                )
+            await db.commit()
+
+        for e in abrir:
+            enquete_broker.publish(e.id, {"id": e.id, "status": e.status})
+        for e in fechar:
+            enquete_broker.publish(e.id, {
+                "id": e.id,
+                "status": e.status,
+                "total_votos": sum(e.resultado["votos"].values()),
+                **{k: v for k, v in e.resultado.items() if k not in ("votantes", "encerrada_em")},
+            })
+        self._stats["abertas"] += len(abrir)
+        self._stats["encerradas"] += len(fechar)
+        return len(abrir), len(fechar)
+
+
+def _resumo(resultado: dict) -> str:
+    if resultado.get("approved") is True:
+        return "Aprovada. O resultado final está disponível."
+    if resultado.get("approved") is False:
+        return "Não aprovada. O resultado final está disponível."
+    return "O resultado final está disponível."
+
+
+enquete_scheduler = EnqueteScheduler()
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException, Request
+
+# Cada conexão custa uma corrotina e uma fila pequena; o limite protege a VM
+# de 256MB quando a assembleia inteira abre a mesma enquete.
+SSE_MAX_CONNECTIONS = int(os.getenv("SSE_MAX_CONNECTIONS", "100"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "8"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+
+@dataclass(eq=False)
+class _Subscription:
+    enquete_id: str
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=SSE_QUEUE_SIZE))
+
+
+class EnqueteBroker:
+    """Pub/sub em memória: votar/responder publicam a apuração, os streams SSE
+    de cada enquete recebem.
+
+    Só vale dentro de um processo (o backend roda com um worker). Cada evento
+    traz a apuração inteira, que é pequena, então um cliente lento pode perder
+    eventos antigos sem ficar com o placar errado: com a fila cheia o mais
+    antigo é descartado.
+    """
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self._subs: dict[str, set[_Subscription]] = {}
+        self._count = 0
+        self._stats = {"published": 0, "delivered": 0, "dropped": 0, "rejected": 0}
+
+    def check_capacity(self) -> None:
+        """503 antes de abrir o stream, enquanto ainda dá para mandar status."""
+        if self._count >= self.max_connections:
+            self._stats["rejected"] += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Muitas conexões abertas, tente novamente em instantes",
+                headers={"Retry-After": "30"},
+            )
+
+    def subscribe(self, enquete_id: str) -> _Subscription:
+        self.check_capacity()
+        sub = _Subscription(enquete_id)
+        self._subs.setdefault(enquete_id, set()).add(sub)
+        self._count += 1
+        return sub
+
+    def unsubscribe(self, sub: _Subscription) -> None:
+        subs = self._subs.get(sub.enquete_id)
+        if subs is None or sub not in subs:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._subs[sub.enquete_id]
+        self._count -= 1
+
+    def publish(self, enquete_id: str, event: dict) -> None:
+        self._stats["published"] += 1
+        for sub in self._subs.get(enquete_id, ()):
+            if sub.queue.full():
+                sub.queue.get_nowait()
+                self._stats["dropped"] += 1
+            sub.queue.put_nowait(event)
+            self._stats["delivered"] += 1
+
+    async def events(
+        self, enquete_id: str, request: Request, inicial: dict
+    ) -> AsyncIterator[str]:
+        """Corpo do StreamingResponse: apuração atual, depois cada atualização,
+        com um comentário de heartbeat quando fica quieto.
+
+        A inscrição acontece aqui dentro: se o cliente cair antes de o corpo
+        começar, o gerador nem roda e não sobra inscrição para trás.
+        """
+        try:
+            sub = self.subscribe(enquete_id)
+        except HTTPException:
+            # lotou entre o check_capacity da rota e o início do corpo
+            yield "retry: 30000\n\n"
+            return
+        try:
+            yield _format(inicial)
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                yield _format(event)
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "connections": self._count,
+            "max_connections": self.max_connections,
+            "enquetes": len(self._subs),
+        }
+
+
+def _format(event: dict) -> str:
+    return f"event: apuracao\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+enquete_broker = EnqueteBroker(SSE_MAX_CONNECTIONS)
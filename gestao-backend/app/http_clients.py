@@ -0,0 +1,116 @@
+import importlib.util
+import os
+from dataclasses import dataclass
+
+import httpx
+
+# HTTP/2 só se o pacote h2 estiver instalado (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    timeout: float
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float = 60.0
+    follow_redirects: bool = False
+
+
+CLIENT_CONFIGS: dict[str, ClientConfig] = {
+    "supabase": ClientConfig(
+        timeout=float(os.getenv("HTTP_TIMEOUT_SUPABASE", "10")),
+        max_connections=10,
+        max_keepalive_connections=5,
+    ),
+    "resend": ClientConfig(
+        timeout=float(os.getenv("HTTP_TIMEOUT_RESEND", "10")),
+        max_connections=4,
+        max_keepalive_connections=2,
+    ),
+    "google": ClientConfig(
+        timeout=float(os.getenv("HTTP_TIMEOUT_GOOGLE", "15")),
+        max_connections=4,
+        max_keepalive_connections=2,
+        follow_redirects=True,
+    ),
+}
+
+
+class HttpClients:
+    """Um httpx.AsyncClient por dependência externa, reaproveitado entre requests.
+
+    Os clientes são abertos no lifespan do app (ou sob demanda, em scripts) e
+    mantêm conexões keep-alive, evitando um handshake TCP+TLS por chamada.
+    """
+
+    def __init__(self, configs: dict[str, ClientConfig]):
+        self.configs = configs
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._counters: dict[str, dict[str, int]] = {
+            name: {"requests": 0, "errors": 0} for name in configs
+        }
+
+    def open(self) -> None:
+        for name in self.configs:
+            self.get(name)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build(name)
+            self._clients[name] = client
+        return client
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def stats(self) -> dict:
+        out = {}
+        for name, config in self.configs.items():
+            client = self._clients.get(name)
+            connections = _pool_connections(client) if client else []
+            out[name] = {
+                **self._counters[name],
+                "open": client is not None and not client.is_closed,
+                "http2": HTTP2_AVAILABLE,
+                "timeout": config.timeout,
+                "max_connections": config.max_connections,
+                "connections": len(connections),
+                "idle_connections": sum(1 for c in connections if c.is_idle()),
+            }
+        return out
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        config = self.configs[name]
+        counters = self._counters[name]
+
+        async def on_request(request: httpx.Request) -> None:
+            counters["requests"] += 1
+
+        async def on_response(response: httpx.Response) -> None:
+            if response.status_code >= 500:
+                counters["errors"] += 1
+
+        return httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=config.timeout,
+            follow_redirects=config.follow_redirects,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            event_hooks={"request": [on_request], "response": [on_response]},
+        )
+
+
+def _pool_connections(client: httpx.AsyncClient) -> list:
+    # httpx não expõe o pool publicamente; ler do transporte se disponível
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    return list(getattr(pool, "connections", []))
+
+
+http_clients = HttpClients(CLIENT_CONFIGS)
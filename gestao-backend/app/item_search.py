@@ -0,0 +1,171 @@
+import re
+import unicodedata
+from collections.abc import Iterable
+
+from sqlalchemy import String, and_, bindparam, cast, delete, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.bulk import dialect_insert
+from app.models.item import Item
+from app.models.sync_state import SyncState
+
+# Índice de busca do acervo, fora do ORM: FTS5 no SQLite, tsvector + pg_trgm no
+# Postgres. O texto é normalizado aqui (minúsculas, sem acento) para os dois
+# bancos se comportarem igual.
+#
+# Se init_search falhar no startup (ex.: sem FTS5 ou sem permissão para o
+# pg_trgm), o índice fica marcado como indisponível: reindex só grava em
+# sync_state que o índice ficou sujo, e a busca cai num LIKE direto em
+# `items`, sem ranking. O próximo init_search que der certo reconstrói tudo.
+_SUJO = "items_fts_sujo"
+
+_SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        codigo, nome, texto, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+]
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """CREATE TABLE IF NOT EXISTS items_fts (
+        codigo VARCHAR PRIMARY KEY,
+        nome TEXT NOT NULL,
+        texto TEXT NOT NULL,
+        documento tsvector NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_items_fts_documento ON items_fts USING gin (documento)",
+    "CREATE INDEX IF NOT EXISTS ix_items_fts_nome_trgm ON items_fts USING gin (nome gin_trgm_ops)",
+]
+
+_SQLITE_INSERT = text("INSERT INTO items_fts (codigo, nome, texto) VALUES (:codigo, :nome, :texto)")
+_POSTGRES_INSERT = text(
+    """INSERT INTO items_fts (codigo, nome, texto, documento) VALUES (
+        :codigo, :nome, :texto,
+        setweight(to_tsvector('simple', :nome), 'A')
+        || setweight(to_tsvector('simple', :codigo_texto), 'B')
+        || setweight(to_tsvector('simple', :texto), 'C')
+    )"""
+)
+_DELETE = text("DELETE FROM items_fts WHERE codigo IN :codigos").bindparams(
+    bindparam("codigos", expanding=True)
+)
+
+_SQLITE_SEARCH = text(
+    """SELECT codigo FROM items_fts WHERE items_fts MATCH :consulta
+    ORDER BY bm25(items_fts, 2.0, 4.0, 1.0) LIMIT :limite"""
+)
+# tsquery com prefixo; a similaridade de trigramas no nome pega erros de digitação
+_POSTGRES_SEARCH = text(
+    """SELECT codigo FROM items_fts, to_tsquery('simple', :consulta) AS q
+    WHERE documento @@ q OR nome % :termos
+    ORDER BY ts_rank(documento, q) + similarity(nome, :termos) DESC
+    LIMIT :limite"""
+)
+
+
+def fold(value: str | None) -> str:
+    """Minúsculas sem acento: "Furadeira Elétrica" -> "furadeira eletrica"."""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def _terms(q: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", fold(q))
+
+
+_COLUNAS = (Item.codigo, Item.nome, Item.descricao, Item.tags, Item.responsavel)
+
+_stats = {"available": False, "fallback_searches": 0}
+
+
+def _document(item) -> dict:
+    texto = (item.descricao, " ".join(item.tags or []), item.responsavel)
+    return {
+        "codigo": item.codigo,
+        "codigo_texto": re.sub(r"[^a-z0-9]+", " ", fold(item.codigo)),
+        "nome": fold(item.nome),
+        "texto": " ".join(fold(v) for v in texto if v),
+    }
+
+
+async def init_search(conn: AsyncConnection) -> None:
+    """Cria o índice e o reconstrói se algum reindex foi pulado (marca em
+    sync_state) ou se a contagem não bate com `items` (primeira vez)."""
+    _stats["available"] = False
+    postgres = conn.dialect.name == "postgresql"
+    for sql in _POSTGRES_DDL if postgres else _SQLITE_DDL:
+        await conn.execute(text(sql))
+    indexados = (await conn.execute(text("SELECT count(*) FROM items_fts"))).scalar()
+    total = (await conn.execute(select(func.count()).select_from(Item))).scalar()
+    sujo = (await conn.execute(select(SyncState.fonte).where(SyncState.fonte == _SUJO))).first()
+    if sujo or indexados != total:
+        await conn.execute(text("DELETE FROM items_fts"))
+        result = await conn.execute(select(*_COLUNAS))
+        rows = [_document(item) for item in result.all()]
+        if rows:
+            await conn.execute(_POSTGRES_INSERT if postgres else _SQLITE_INSERT, rows)
+        await conn.execute(delete(SyncState).where(SyncState.fonte == _SUJO))
+    _stats["available"] = True
+
+
+def stats() -> dict:
+    return dict(_stats)
+
+
+async def reindex(db: AsyncSession, codigos: Iterable[str]) -> None:
+    """Atualiza o índice dos itens dados (criados, alterados ou excluídos).
+
+    Roda na transação do chamador, junto com a escrita do item. Sem índice,
+    só marca que ele ficou sujo (o próximo init_search reconstrói).
+    """
+    if not _stats["available"]:
+        await db.execute(
+            dialect_insert(db)(SyncState).values(fonte=_SUJO, row_hashes={}).on_conflict_do_nothing()
+        )
+        return
+    codigos = list(codigos)
+    postgres = db.bind.dialect.name == "postgresql"
+    for start in range(0, len(codigos), 500):
+        lote = codigos[start:start + 500]
+        await db.execute(_DELETE, {"codigos": lote})
+        result = await db.execute(select(*_COLUNAS).where(Item.codigo.in_(lote)))
+        rows = [_document(item) for item in result.all()]
+        if rows:
+            await db.execute(_POSTGRES_INSERT if postgres else _SQLITE_INSERT, rows)
+
+
+async def search(db: AsyncSession, q: str, limit: int) -> list[str]:
+    """Códigos dos itens que casam com `q`, do mais relevante ao menos."""
+    terms = _terms(q)
+    if not terms:
+        return []
+    if not _stats["available"]:
+        return await _search_like(db, terms, limit)
+    if db.bind.dialect.name == "postgresql":
+        consulta = " & ".join(f"{t}:*" for t in terms)
+        result = await db.execute(
+            _POSTGRES_SEARCH, {"consulta": consulta, "termos": " ".join(terms), "limite": limit}
+        )
+    else:
+        consulta = " ".join(f'"{t}"*' for t in terms)
+        result = await db.execute(_SQLITE_SEARCH, {"consulta": consulta, "limite": limit})
+    return list(result.scalars().all())
+
+
+async def _search_like(db: AsyncSession, terms: list[str], limit: int) -> list[str]:
+    """Busca sem índice: todos os termos em algum campo, por nome.
+
+    Mais lenta e sensível a acento, mas mantém /search de pé.
+    """
+    _stats["fallback_searches"] += 1
+    # mesmos campos do documento do índice; tags é JSON, comparado como texto
+    campos = (Item.nome, Item.codigo, Item.descricao, cast(Item.tags, String), Item.responsavel)
+    query = (
+        select(Item.codigo)
+        .where(and_(*(or_(*(c.ilike(f"%{t}%") for c in campos)) for t in terms)))
+        .order_by(Item.nome)
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return list(result.scalars().all())
@@ -0,0 +1,267 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import async_session
+from app.pagination import as_utc, utcnow
+from app.models.log import Log
+
+# Logs mais antigos que o horizonte saem da tabela e vão para segmentos
+# mensais em disco: logs-AAAA-MM.ndjson.gz, só com append (cada rodada
+# acrescenta um membro gzip) e um logs-AAAA-MM.idx.json ao lado, com o
+# offset, o intervalo de tempo e os valores dos filtros de cada membro.
+_PADRAO_DIR = "/data/log-archive" if os.getenv("USE_PERSISTENT_DISK") == "true" and os.path.exists("/data") else "./log-archive"
+LOG_ARCHIVE_DIR = Path(os.getenv("LOG_ARCHIVE_DIR", _PADRAO_DIR))
+LOG_ARCHIVE_AFTER_DAYS = int(os.getenv("LOG_ARCHIVE_AFTER_DAYS", "180"))
+LOG_ARCHIVE_BATCH_SIZE = int(os.getenv("LOG_ARCHIVE_BATCH_SIZE", "1000"))
+LOG_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("LOG_ARCHIVE_INTERVAL_SECONDS", "86400"))
+
+_COLUNAS = Log.__table__.columns.keys()
+# (campo do Log, chave no índice do membro) usados para pular membros inteiros
+_FILTROS = (("item_codigo", "itens"), ("profile_slug", "perfis"), ("acao", "acoes"))
+
+logger = logging.getLogger(__name__)
+
+
+def _segmento(mes: str) -> Path:
+    return LOG_ARCHIVE_DIR / f"logs-{mes}.ndjson.gz"
+
+
+def _indice(mes: str) -> Path:
+    return LOG_ARCHIVE_DIR / f"logs-{mes}.idx.json"
+
+
+def _carregar_indice(mes: str) -> dict:
+    try:
+        return json.loads(_indice(mes).read_text())
+    except FileNotFoundError:
+        return {"mes": mes, "membros": []}
+
+
+def _meses() -> list[str]:
+    """Meses arquivados, do mais novo para o mais antigo."""
+    if not LOG_ARCHIVE_DIR.exists():
+        return []
+    return sorted((p.name[5:12] for p in LOG_ARCHIVE_DIR.glob("logs-*.idx.json")), reverse=True)
+
+
+_horizonte: dict = {"chave": None, "valor": None}
+
+
+def archive_horizon() -> datetime | None:
+    """Timestamp do Log arquivado mais novo: nada depois dele está em disco.
+
+    Só relê o índice quando o arquivo muda, então o list_logs pode consultar
+    a cada request para decidir se precisa abrir os segmentos.
+    """
+    for mes in _meses():
+        try:
+            chave = (mes, _indice(mes).stat().st_mtime_ns)
+        except FileNotFoundError:
+            continue
+        if _horizonte["chave"] != chave:
+            membros = _carregar_indice(mes)["membros"]
+            _horizonte["valor"] = datetime.fromisoformat(max(m["max_ts"] for m in membros)) if membros else None
+            _horizonte["chave"] = chave
+        if _horizonte["valor"] is not None:
+            return _horizonte["valor"]
+    return None
+
+
+def _iso(value: datetime) -> str:
+    """Sempre com microssegundos, para comparar como texto."""
+    return as_utc(value).isoformat(timespec="microseconds")
+
+
+def _serializar(log: Log) -> dict:
+    row = {c: getattr(log, c) for c in _COLUNAS}
+    row["timestamp"] = _iso(log.timestamp)
+    return row
+
+
+def _append(mes: str, rows: list[dict]) -> None:
+    """Acrescenta um membro gzip ao segmento do mês e registra no índice.
+
+    Bytes além do último membro indexado (rodada interrompida) são descartados
+    antes; o índice é trocado atomicamente depois do fsync do segmento.
+    """
+    LOG_ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    indice = _carregar_indice(mes)
+    fim = sum(m["length"] for m in indice["membros"])
+    dados = gzip.compress(
+        "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in rows).encode()
+    )
+    with open(_segmento(mes), "ab") as f:
+        f.truncate(fim)
+        f.seek(fim)
+        f.write(dados)
+        f.flush()
+        os.fsync(f.fileno())
+    membro = {
+        "offset": fim,
+        "length": len(dados),
+        "count": len(rows),
+        "min_ts": min(r["timestamp"] for r in rows),
+        "max_ts": max(r["timestamp"] for r in rows),
+    }
+    for campo, chave in _FILTROS:
+        membro[chave] = sorted({r[campo] for r in rows if r[campo]})
+    indice["membros"].append(membro)
+    tmp = _indice(mes).with_suffix(".tmp")
+    tmp.write_text(json.dumps(indice))
+    os.replace(tmp, _indice(mes))
+
+
+def read_archive(
+    item_codigo: str | None = None,
+    profile_slug: str | None = None,
+    acao: str | None = None,
+    desde: datetime | None = None,
+    ate: datetime | None = None,
+    antes_de: tuple[datetime, str] | None = None,
+    limit: int | None = None,
+) -> list[Log]:
+    """Logs arquivados que casam com os filtros, mais novos primeiro.
+
+    Mesma semântica do list_logs: janela [desde, ate) e, com `antes_de`,
+    só o que vem depois do cursor (timestamp, id). Para no primeiro mês que
+    completar `limit`; os meses não se sobrepõem no tempo.
+    """
+    filtros = {"item_codigo": item_codigo, "profile_slug": profile_slug, "acao": acao}
+    desde_iso = _iso(desde) if desde else None
+    ate_iso = _iso(ate) if ate else None
+    cursor_iso = (_iso(antes_de[0]), antes_de[1]) if antes_de else None
+    encontrados: list[dict] = []
+    for mes in _meses():
+        if limit and len(encontrados) > limit:
+            break
+        achados_mes: dict[str, dict] = {}  # por id: um lote pode ter sido arquivado duas vezes
+        membros = _carregar_indice(mes)["membros"]
+        try:
+            f = open(_segmento(mes), "rb")
+        except FileNotFoundError:
+            logger.warning("Segmento de logs %s sumiu; índice ignorado", mes)
+            continue
+        with f:
+            for membro in membros:
+                if desde_iso and membro["max_ts"] < desde_iso:
+                    continue
+                if ate_iso and membro["min_ts"] >= ate_iso:
+                    continue
+                if cursor_iso and membro["min_ts"] > cursor_iso[0]:
+                    continue
+                if any(filtros[campo] and filtros[campo] not in membro[chave] for campo, chave in _FILTROS):
+                    continue
+                f.seek(membro["offset"])
+                try:
+                    linhas = gzip.decompress(f.read(membro["length"])).splitlines()
+                except (OSError, EOFError):
+                    logger.warning("Membro corrompido em %s (offset %d); pulado", mes, membro["offset"])
+                    continue
+                for linha in linhas:
+                    row = json.loads(linha)
+                    ts = row["timestamp"]
+                    if any(valor and row[campo] != valor for campo, valor in filtros.items()):
+                        continue
+                    if (desde_iso and ts < desde_iso) or (ate_iso and ts >= ate_iso):
+                        continue
+                    if cursor_iso and (ts, row["id"]) >= cursor_iso:
+                        continue
+                    achados_mes[row["id"]] = row
+        encontrados.extend(sorted(achados_mes.values(), key=lambda r: (r["timestamp"], r["id"]), reverse=True))
+    if limit:
+        encontrados = encontrados[:limit]
+    logs = []
+    for row in encontrados:
+        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+        logs.append(Log(**row))
+    return logs
+
+
+async def archive_older_than(db: AsyncSession, cutoff: datetime) -> int:
+    """Move para os segmentos os Logs anteriores a `cutoff`, em lotes.
+
+    Cada lote é gravado e indexado no disco antes de sair da tabela; se o
+    DELETE falhar, o lote volta a ser arquivado e a leitura descarta o id
+    repetido. Logs importados da planilha (com source_key) ficam na tabela:
+    o índice único é o que evita reimportá-los.
+    """
+    total = 0
+    while True:
+        result = await db.execute(
+            select(Log)
+            .where(Log.timestamp < cutoff, Log.source_key.is_(None))
+            .order_by(Log.timestamp, Log.id)
+            .limit(LOG_ARCHIVE_BATCH_SIZE)
+        )
+        logs = result.scalars().all()
+        if not logs:
+            return total
+        por_mes: dict[str, list[dict]] = {}
+        for log in logs:
+            row = _serializar(log)
+            por_mes.setdefault(row["timestamp"][:7], []).append(row)
+        for mes, rows in por_mes.items():
+            await asyncio.to_thread(_append, mes, rows)
+        await db.execute(delete(Log).where(Log.id.in_([log.id for log in logs])))
+        await db.commit()
+        total += len(logs)
+
+
+class LogArchiver:
+    """Roda archive_older_than periodicamente, em background no lifespan."""
+
+    def __init__(self, session_factory: async_sessionmaker = async_session):
+        self.session_factory = session_factory
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stats = {"runs": 0, "arquivados": 0}
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stop.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        await self._task
+        self._task = None
+
+    async def run_once(self) -> int:
+        cutoff = utcnow() - timedelta(days=LOG_ARCHIVE_AFTER_DAYS)
+        async with self.session_factory() as db:
+            arquivados = await archive_older_than(db, cutoff)
+        self._stats["runs"] += 1
+        self._stats["arquivados"] += arquivados
+        return arquivados
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "dir": str(LOG_ARCHIVE_DIR),
+            "segmentos": len(_meses()),
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Falha ao arquivar logs antigos")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=LOG_ARCHIVE_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+log_archiver = LogArchiver()
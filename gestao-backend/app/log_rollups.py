@@ -0,0 +1,79 @@
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.bulk import upsert
+from app.pagination import as_utc
+from app.models.item import Item
+from app.models.log import Log
+from app.models.log_rollup import LogRollup
+
+# Contagens diárias dos Logs, mantidas no mesmo caminho que grava os Logs
+# (audit_log e importação da planilha): cada lote novo soma nas linhas de
+# log_rollups e em Item.vezes_usado, na mesma transação.
+
+DIMENSOES = ("item_codigo", "local_uso", "acao", "profile_slug")
+_CHAVE = ["dia", *DIMENSOES]
+
+# Ações que contam como um uso do item
+ACOES_USO = ("retirou",)
+
+_items = Item.__table__
+_SOMA_USOS = (
+    update(_items)
+    .where(_items.c.codigo == bindparam("b_codigo"))
+    .values(vezes_usado=func.coalesce(_items.c.vezes_usado, 0) + bindparam("b_usos"))
+)
+
+
+async def apply_rollups(db: AsyncSession, rows: list[dict]) -> None:
+    """Soma um lote de Logs recém-gravados. Quem chama faz o commit."""
+    contagens: Counter[tuple] = Counter()
+    usos: Counter[str] = Counter()
+    for row in rows:
+        dia = as_utc(row["timestamp"]).date()
+        contagens[(dia, *(row[d] or "" for d in DIMENSOES))] += 1
+        if row["acao"] in ACOES_USO and row["item_codigo"]:
+            usos[row["item_codigo"]] += 1
+    if contagens:
+        valores = [{**dict(zip(_CHAVE, k)), "total": n} for k, n in contagens.items()]
+        await upsert(db, LogRollup, valores, key=_CHAVE, update=[], increment=["total"])
+    if usos:
+        await db.execute(_SOMA_USOS, [{"b_codigo": c, "b_usos": n} for c, n in usos.items()])
+
+
+async def init_rollups(conn: AsyncConnection) -> None:
+    """Na primeira vez, monta log_rollups e vezes_usado a partir da tabela logs."""
+    vazio = (await conn.execute(select(func.count()).select_from(LogRollup))).scalar() == 0
+    if not vazio:
+        return
+    dia = func.date(Log.timestamp)
+    dimensoes = [func.coalesce(getattr(Log, d), "") for d in DIMENSOES]
+    await conn.execute(
+        insert(LogRollup).from_select(
+            [*_CHAVE, "total"],
+            select(dia, *dimensoes, func.count()).group_by(dia, *dimensoes),
+        )
+    )
+    usos = (
+        select(func.count())
+        .where(Log.item_codigo == _items.c.codigo, Log.acao.in_(ACOES_USO))
+        .scalar_subquery()
+    )
+    usados = select(Log.item_codigo).where(Log.acao.in_(ACOES_USO))
+    await conn.execute(update(_items).where(_items.c.codigo.in_(usados)).values(vezes_usado=usos))
+
+
+def bucket_start(dia: date, bucket: str) -> date | None:
+    """Início do período (dia, semana de segunda a domingo, mês, ano)."""
+    if bucket == "dia":
+        return dia
+    if bucket == "semana":
+        return dia - timedelta(days=dia.weekday())
+    if bucket == "mes":
+        return dia.replace(day=1)
+    if bucket == "ano":
+        return dia.replace(month=1, day=1)
+    return None
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import async_session
+from app.http_clients import http_clients
+from app.models.outbound_email import OutboundEmail
+
+RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
+FROM_EMAIL = os.getenv("FROM_EMAIL", "noreply@terradecanaa.org")
+
+# "resend" envia de verdade; "stub" só guarda em memória (testes/dev)
+MAIL_TRANSPORT = os.getenv("MAIL_TRANSPORT", "resend" if RESEND_API_KEY else "stub")
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "50"))  # Resend aceita até 100
+MAIL_POLL_SECONDS = float(os.getenv("MAIL_POLL_SECONDS", "30"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "6"))
+MAIL_RATE_PER_SECOND = float(os.getenv("MAIL_RATE_PER_SECOND", "2"))
+# enviados/falhos ficam só para auditoria, sem o corpo, e saem depois disto
+MAIL_RETENTION_DAYS = int(os.getenv("MAIL_RETENTION_DAYS", "30"))
+MAIL_PURGE_INTERVAL_SECONDS = 3600
+MAIL_BACKOFF_SECONDS = 30
+MAIL_BACKOFF_MAX_SECONDS = 3600
+# quanto tempo um lote fica reservado ("enviando"); se o processo cair no meio
+# do envio, depois disso ele volta para a fila
+MAIL_CLAIM_SECONDS = 300
+
+logger = logging.getLogger(__name__)
+
+
+class ResendTransport:
+    async def send(self, messages: list[dict]) -> None:
+        res = await http_clients.get("resend").post(
+            "https://api.resend.com/emails/batch",
+            headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
+            json=messages,
+        )
+        res.raise_for_status()
+
+
+class StubTransport:
+    """Não sai para a rede: guarda as mensagens em `sent`."""
+
+    def __init__(self):
+        self.sent: list[dict] = []
+
+    async def send(self, messages: list[dict]) -> None:
+        self.sent.extend(messages)
+        for m in messages:
+            logger.info("Email (stub) para %s: %s", m["to"], m["subject"])
+
+
+def enqueue_email(db: AsyncSession, to: str, subject: str, html: str) -> OutboundEmail:
+    """Adiciona o email à fila na sessão do chamador; quem chama faz o commit
+    e depois mailer.wake() para não esperar o próximo ciclo."""
+    email = OutboundEmail(para=to, assunto=subject, html=html)
+    db.add(email)
+    return email
+
+
+def _permanente(exc: Exception) -> bool:
+    """4xx (exceto 429) é recusa da mensagem, não vale tentar de novo."""
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return False
+    status = exc.response.status_code
+    return 400 <= status < 500 and status != 429
+
+
+def _backoff(tentativas: int) -> timedelta:
+    return timedelta(seconds=min(MAIL_BACKOFF_SECONDS * 2 ** (tentativas - 1), MAIL_BACKOFF_MAX_SECONDS))
+
+
+class MailWorker:
+    """Envia a fila `outbound_emails` em lotes, em background no lifespan."""
+
+    def __init__(self, transport, session_factory: async_sessionmaker = async_session):
+        self.transport = transport
+        self.session_factory = session_factory
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+        self._last_send = 0.0
+        self._last_purge = 0.0
+        self._stats = {"sent": 0, "failed": 0, "retried": 0, "rejected": 0, "batches": 0, "purged": 0}
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    async def flush(self) -> int:
+        """Envia tudo o que está vencido agora. Retorna quantos foram enviados."""
+        sent = 0
+        while True:
+            count = await self._send_batch()
+            if count <= 0:
+                break
+            sent += count
+        return sent
+
+    async def purge(self) -> int:
+        """Apaga emails enviados/falhos com mais de MAIL_RETENTION_DAYS."""
+        limite = datetime.now(timezone.utc) - timedelta(days=MAIL_RETENTION_DAYS)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(OutboundEmail).where(
+                    OutboundEmail.status.in_(["enviado", "falhou"]),
+                    OutboundEmail.created_at < limite,
+                )
+            )
+            await db.commit()
+        self._stats["purged"] += result.rowcount
+        return result.rowcount
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "transport": type(self.transport).__name__,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            # limpa antes do flush para não perder um wake() feito durante ele
+            self._wake.clear()
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_purge >= MAIL_PURGE_INTERVAL_SECONDS:
+                    self._last_purge = time.monotonic()
+                    await self.purge()
+            except Exception:
+                logger.exception("Falha ao processar fila de emails")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=MAIL_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _throttle(self) -> None:
+        wait = self._last_send + 1 / MAIL_RATE_PER_SECOND - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_send = time.monotonic()
+
+    async def _send_batch(self) -> int:
+        """Envia um lote; retorna quantos foram enviados, 0 se a fila está vazia
+        e -1 se nada do lote saiu (fica para a próxima tentativa).
+
+        Os emails são reservados e a transação fecha antes do envio: nenhum
+        lock fica preso durante o throttle e a chamada HTTP.
+        """
+        reservados = await self._claim()
+        if not reservados:
+            return 0
+
+        await self._throttle()
+        self._stats["batches"] += 1
+        try:
+            await self.transport.send([m for _, m in reservados])
+            resultados = {email_id: None for email_id, _ in reservados}
+        except Exception as exc:
+            if _permanente(exc) and len(reservados) > 1:
+                # lote recusado na validação (ex.: um endereço inválido):
+                # manda um a um para não derrubar os outros
+                resultados = await self._send_each(reservados)
+            else:
+                resultados = {email_id: exc for email_id, _ in reservados}
+                logger.warning("Envio de %d emails falhou: %s", len(reservados), exc)
+
+        await self._finish(resultados)
+        enviados = sum(1 for exc in resultados.values() if exc is None)
+        return enviados or -1
+
+    async def _claim(self) -> list[tuple[str, dict]]:
+        """Reserva o próximo lote (status "enviando" até MAIL_CLAIM_SECONDS)."""
+        async with self.session_factory() as db:
+            now = datetime.now(timezone.utc)
+            result = await db.execute(
+                select(OutboundEmail)
+                .where(
+                    OutboundEmail.status.in_(["pendente", "enviando"]),
+                    OutboundEmail.proxima_tentativa <= now,
+                )
+                .order_by(OutboundEmail.proxima_tentativa)
+                .limit(MAIL_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+            reservados = []
+            for e in result.scalars().all():
+                e.status = "enviando"
+                e.proxima_tentativa = now + timedelta(seconds=MAIL_CLAIM_SECONDS)
+                reservados.append(
+                    (e.id, {"from": FROM_EMAIL, "to": [e.para], "subject": e.assunto, "html": e.html})
+                )
+            await db.commit()
+        return reservados
+
+    async def _send_each(self, reservados: list[tuple[str, dict]]) -> dict[str, Exception | None]:
+        resultados: dict[str, Exception | None] = {}
+        for email_id, message in reservados:
+            await self._throttle()
+            try:
+                await self.transport.send([message])
+            except Exception as exc:
+                logger.warning("Envio para %s falhou: %s", message["to"][0], exc)
+                resultados[email_id] = exc
+            else:
+                resultados[email_id] = None
+        return resultados
+
+    async def _finish(self, resultados: dict[str, Exception | None]) -> None:
+        """Grava o resultado de cada email reservado: enviado, falhou ou de volta à fila."""
+        async with self.session_factory() as db:
+            now = datetime.now(timezone.utc)
+            result = await db.execute(select(OutboundEmail).where(OutboundEmail.id.in_(list(resultados))))
+            for e in result.scalars().all():
+                exc = resultados[e.id]
+                e.tentativas = (e.tentativas or 0) + 1
+                if exc is None:
+                    e.status = "enviado"
+                    e.enviado_em = now
+                    e.erro = None
+                    e.html = ""  # o corpo pode ter link de redefinição de senha
+                    self._stats["sent"] += 1
+                    continue
+                e.erro = str(exc)[:500]
+                if _permanente(exc) or e.tentativas >= MAIL_MAX_ATTEMPTS:
+                    e.status = "falhou"
+                    e.html = ""
+                    self._stats["rejected" if _permanente(exc) else "failed"] += 1
+                else:
+                    e.status = "pendente"
+                    e.proxima_tentativa = now + _backoff(e.tentativas)
+                    self._stats["retried"] += 1
+            await db.commit()
+
+mailer = MailWorker(ResendTransport() if MAIL_TRANSPORT == "resend" else StubTransport())
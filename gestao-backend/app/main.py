@@ -7,7 +7,18 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+from app import item_search, passwords
+from app.apuracao import migrar_votos_legado
+from app.audit_log import audit_log
 from app.database import engine, init_db
+from app.enquete_scheduler import enquete_scheduler
+from app.enquete_stream import enquete_broker
+from app.http_clients import http_clients
+from app.item_search import init_search
+from app.log_archive import log_archiver
+from app.log_rollups import init_rollups
+from app.mailer import mailer
+from app.maintenance import maintenance_job
 from app.routers import (
     auth,
     profiles,
@@ -24,7 +35,8 @@ from app.routers import (
     cotas,
     eventos,
 )
-from app.routers.auth import get_current_user
+from app.routers.auth import get_principal, verifier_stats
+from app.token_cache import token_cache
 
 
 @asynccontextmanager
@@ -56,6 +68,25 @@ async def lifespan(app: FastAPI):
         "ALTER TABLE profiles ADD COLUMN is_admin BOOLEAN DEFAULT FALSE",
         "ALTER TABLE cotas ADD COLUMN em_obra BOOLEAN DEFAULT FALSE",
         "ALTER TABLE cotas ADD COLUMN obra_info JSON",
+        "ALTER TABLE profiles ADD COLUMN token_version INTEGER DEFAULT 0",
+        "ALTER TABLE enquetes ADD COLUMN resultado JSON",
+        "CREATE INDEX IF NOT EXISTS ix_enquetes_status_voting_starts_at ON enquetes (status, voting_starts_at)",
+        "CREATE INDEX IF NOT EXISTS ix_enquetes_status_closes_at ON enquetes (status, closes_at)",
+        "CREATE INDEX IF NOT EXISTS ix_enquete_comentarios_enquete_created ON enquete_comentarios (enquete_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_items_categoria ON items (categoria)",
+        "CREATE INDEX IF NOT EXISTS ix_items_estado ON items (estado)",
+        "CREATE INDEX IF NOT EXISTS ix_items_space_slug ON items (space_slug)",
+        "CREATE INDEX IF NOT EXISTS ix_items_tipo ON items (tipo)",
+        "CREATE INDEX IF NOT EXISTS ix_items_disponibilidade ON items (disponibilidade)",
+        "CREATE INDEX IF NOT EXISTS ix_items_proxima_manutencao ON items (proxima_manutencao)",
+        "CREATE INDEX IF NOT EXISTS ix_logs_timestamp_id ON logs (timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS ix_logs_item_codigo_timestamp ON logs (item_codigo, timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS ix_logs_profile_slug_timestamp ON logs (profile_slug, timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS ix_logs_acao_timestamp ON logs (acao, timestamp, id)",
+        "ALTER TABLE logs ADD COLUMN source_key VARCHAR",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_logs_source_key ON logs (source_key)",
+        "ALTER TABLE alert_leituras ADD COLUMN lido BOOLEAN DEFAULT TRUE",
+        "ALTER TABLE alert_leituras ADD COLUMN oculto BOOLEAN DEFAULT FALSE",
     ]
     import logging
     for sql in migrations:
@@ -68,7 +99,30 @@ async def lifespan(app: FastAPI):
                 continue
             logging.warning(f"Migration warning: {e}")
     await init_db()
+    # votos/respostas antigos (JSON em enquetes) entram nas tabelas, uma vez
+    async with engine.begin() as conn:
+        await migrar_votos_legado(conn)
+    try:
+        async with engine.begin() as conn:
+            await init_search(conn)
+    except Exception as e:
+        logging.warning(f"Índice de busca do acervo indisponível, /search usa LIKE: {e}")
+    async with engine.begin() as conn:
+        await init_rollups(conn)
+    http_clients.open()
+    mailer.start()
+    enquete_scheduler.start()
+    maintenance_job.start()
+    audit_log.start()
+    log_archiver.start()
     yield
+    await log_archiver.stop()
+    # esvazia a fila de logs antes de a máquina parar
+    await audit_log.stop()
+    await maintenance_job.stop()
+    await enquete_scheduler.stop()
+    await mailer.stop()
+    await http_clients.aclose()
 
 
 app = FastAPI(title="Gestao Comunitaria API", lifespan=lifespan)
@@ -82,24 +136,43 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(auth.router)
-app.include_router(profiles.router, dependencies=[Depends(get_current_user)])
-app.include_router(spaces.router, dependencies=[Depends(get_current_user)])
-app.include_router(items.router, dependencies=[Depends(get_current_user)])
-app.include_router(bookings.router, dependencies=[Depends(get_current_user)])
-app.include_router(logs.router, dependencies=[Depends(get_current_user)])
-app.include_router(wiki.router, dependencies=[Depends(get_current_user)])
-app.include_router(alerts.router, dependencies=[Depends(get_current_user)])
-app.include_router(chamados.router, dependencies=[Depends(get_current_user)])
-app.include_router(prestadores.router, dependencies=[Depends(get_current_user)])
-app.include_router(enquetes.router, dependencies=[Depends(get_current_user)])
-app.include_router(sheets.router, dependencies=[Depends(get_current_user)])
-app.include_router(cotas.router, dependencies=[Depends(get_current_user)])
-app.include_router(eventos.router, dependencies=[Depends(get_current_user)])
+app.include_router(profiles.router, dependencies=[Depends(get_principal)])
+app.include_router(spaces.router, dependencies=[Depends(get_principal)])
+app.include_router(items.router, dependencies=[Depends(get_principal)])
+app.include_router(bookings.router, dependencies=[Depends(get_principal)])
+app.include_router(logs.router, dependencies=[Depends(get_principal)])
+app.include_router(wiki.router, dependencies=[Depends(get_principal)])
+app.include_router(alerts.router, dependencies=[Depends(get_principal)])
+app.include_router(chamados.router, dependencies=[Depends(get_principal)])
+app.include_router(prestadores.router, dependencies=[Depends(get_principal)])
+app.include_router(enquetes.router, dependencies=[Depends(get_principal)])
+app.include_router(enquetes.stream_router)
+app.include_router(sheets.router, dependencies=[Depends(get_principal)])
+app.include_router(cotas.router, dependencies=[Depends(get_principal)])
+app.include_router(eventos.router, dependencies=[Depends(get_principal)])
 
 
 @app.get("/healthz")
 async def healthz():
     return {"status": "ok"}
+
+
+@app.get("/metrics", dependencies=[Depends(get_principal)])
+async def metrics():
+    return {
+        "token_cache": token_cache.stats(),
+        "auth_verifiers": verifier_stats(),
+        "http_clients": http_clients.stats(),
+        "passwords": passwords.stats(),
+        "mailer": mailer.stats(),
+        "enquete_stream": enquete_broker.stats(),
+        "enquete_scheduler": enquete_scheduler.stats(),
+        "maintenance": maintenance_job.stats(),
+        "audit_log": audit_log.stats(),
+        "log_archive": log_archiver.stats(),
+        "item_search": item_search.stats(),
+    }
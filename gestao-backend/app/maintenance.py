@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import re
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.alert_fanout import broadcast_alert
+from app.database import async_session
+from app.item_search import fold
+from app.models.alert import Alert
+from app.models.item import Item
+from app.models.log import Log
+from app.pagination import utcnow
+
+MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "21600"))  # 6h
+MAINTENANCE_ALERT_DAYS = int(os.getenv("MAINTENANCE_ALERT_DAYS", "7"))
+
+ACAO_MANUTENCAO = "manutencao_realizada"
+
+_CICLOS = {
+    "diario": 1, "diaria": 1, "semanal": 7, "quinzenal": 15, "mensal": 30,
+    "bimestral": 60, "trimestral": 90, "semestral": 182, "anual": 365,
+}
+_UNIDADES = {"dia": 1, "semana": 7, "mes": 30, "meses": 30, "ano": 365}
+
+logger = logging.getLogger(__name__)
+
+
+def parse_ciclo(ciclo: str | None) -> timedelta | None:
+    """Interpreta o texto livre de ciclo_manutencao.
+
+    Aceita "mensal", "trimestral", "a cada 3 meses", "15 dias", "2 anos"...
+    Devolve None quando não reconhece.
+    """
+    if not ciclo:
+        return None
+    texto = fold(ciclo).strip()
+    for nome, dias in _CICLOS.items():
+        if nome in texto:
+            return timedelta(days=dias)
+    match = re.search(r"(\d+)\s*(dia|semana|meses|mes|ano)", texto)
+    if match:
+        return timedelta(days=int(match.group(1)) * _UNIDADES[match.group(2)])
+    return None
+
+
+async def roll_forward(db: AsyncSession) -> int:
+    """Atualiza ultima/proxima_manutencao a partir dos Logs de manutenção.
+
+    A próxima só é recalculada quando há manutenção nova (ou ainda não há
+    próxima): uma data acertada à mão no item continua valendo até a
+    manutenção seguinte. Retorna quantos itens mudaram; quem chama faz o commit.
+    """
+    ultimos = (
+        select(Log.item_codigo, func.max(Log.timestamp).label("ultima"))
+        .where(Log.acao == ACAO_MANUTENCAO, Log.item_codigo.isnot(None))
+        .group_by(Log.item_codigo)
+        .subquery()
+    )
+    result = await db.execute(
+        select(Item, ultimos.c.ultima)
+        .outerjoin(ultimos, ultimos.c.item_codigo == Item.codigo)
+        .where(or_(
+            ultimos.c.ultima.isnot(None),
+            and_(Item.ciclo_manutencao.isnot(None), Item.proxima_manutencao.is_(None)),
+        ))
+    )
+    changed = 0
+    for item, ultima_log in result.all():
+        ultima = item.ultima_manutencao
+        if ultima_log is not None and (ultima is None or ultima_log.date() > ultima):
+            ultima = ultima_log.date()
+        ciclo = parse_ciclo(item.ciclo_manutencao)
+        proxima = item.proxima_manutencao
+        if ultima != item.ultima_manutencao or proxima is None:
+            if ultima and ciclo:
+                proxima = ultima + ciclo
+            elif proxima and ultima and proxima <= ultima:
+                proxima = None  # manutenção feita e sem ciclo para prever a próxima
+        if (ultima, proxima) != (item.ultima_manutencao, item.proxima_manutencao):
+            item.ultima_manutencao = ultima
+            item.proxima_manutencao = proxima
+            changed += 1
+    return changed
+
+
+def due_query(within_days: int):
+    limite = utcnow().date() + timedelta(days=within_days)
+    return (
+        select(Item)
+        .where(Item.proxima_manutencao.isnot(None), Item.proxima_manutencao <= limite)
+        .order_by(Item.proxima_manutencao, Item.nome)
+    )
+
+
+async def alert_due(db: AsyncSession) -> int:
+    """Um único alerta por dia resumindo os itens vencidos e os que vencem nos
+    próximos MAINTENANCE_ALERT_DAYS. Retorna quantos itens entraram nele.
+
+    O dia é o de UTC, o mesmo relógio de Alert.created_at."""
+    hoje = utcnow().date()
+    inicio_do_dia = datetime.combine(hoje, time.min)
+    ja_enviado = await db.execute(
+        select(Alert.id)
+        .where(Alert.tipo == "manutencao", Alert.created_at >= inicio_do_dia)
+        .limit(1)
+    )
+    if ja_enviado.first():
+        return 0
+
+    result = await db.execute(due_query(MAINTENANCE_ALERT_DAYS))
+    items = result.scalars().all()
+    if not items:
+        return 0
+    vencidos = [i.codigo for i in items if i.proxima_manutencao < hoje]
+    proximos = [i.codigo for i in items if i.proxima_manutencao >= hoje]
+    partes = []
+    if vencidos:
+        partes.append(f"{len(vencidos)} vencida(s)")
+    if proximos:
+        partes.append(f"{len(proximos)} nos próximos {MAINTENANCE_ALERT_DAYS} dias")
+    await broadcast_alert(
+        db,
+        tipo="manutencao",
+        titulo=f"Manutenção do acervo: {' e '.join(partes)}",
+        mensagem=", ".join(i.nome for i in items[:10]) + ("…" if len(items) > 10 else ""),
+        dados={"vencidos": vencidos, "proximos": proximos},
+    )
+    return len(items)
+
+
+class MaintenanceJob:
+    """Roda roll_forward e alert_due periodicamente, em background no lifespan."""
+
+    def __init__(self, session_factory: async_sessionmaker = async_session):
+        self.session_factory = session_factory
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stats = {"runs": 0, "atualizados": 0, "alertados": 0}
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stop.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        await self._task
+        self._task = None
+
+    async def run_once(self) -> tuple[int, int]:
+        async with self.session_factory() as db:
+            atualizados = await roll_forward(db)
+            await db.flush()
+            alertados = await alert_due(db)
+            await db.commit()
+        self._stats["runs"] += 1
+        self._stats["atualizados"] += atualizados
+        self._stats["alertados"] += alertados
+        return atualizados, alertados
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Falha no job de manutenção do acervo")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=MAINTENANCE_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+maintenance_job = MaintenanceJob()
@@ -3,15 +3,22 @@ from app.models.space import Space
 from app.models.item import Item
 from app.models.booking import Booking
 from app.models.log import Log
+from app.models.log_rollup import LogRollup
 from app.models.wiki_article import WikiArticle
 from app.models.alert import Alert
+from app.models.alert_leitura import AlertLeitura
 from app.models.chamado import Chamado
 from app.models.prestador import Prestador
 from app.models.enquete import Enquete
 from app.models.enquete_comentario import EnqueteComentario
+from app.models.enquete_voto import EnqueteVoto
+from app.models.enquete_resposta import EnqueteResposta
 from app.models.sheet_row import SheetRow
+from app.models.outbound_email import OutboundEmail
+from app.models.sync_state import SyncState
 
 __all__ = [
-    "Profile", "Space", "Item", "Booking", "Log", "WikiArticle", "Alert",
+    "Profile", "Space", "Item", "Booking", "Log", "WikiArticle", "Alert", "AlertLeitura",
     "Chamado", "Prestador", "Enquete", "EnqueteComentario", "SheetRow",
+    "EnqueteVoto", "EnqueteResposta", "OutboundEmail", "SyncState", "LogRollup",
 ]
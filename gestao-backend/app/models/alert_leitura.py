@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+from sqlalchemy import Boolean, String, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class AlertLeitura(Base):
+    """Estado de um alerta para um perfil: lido (alertas gerais) e oculto.
+
+    Alertas de um perfil continuam usando Alert.lido; `oculto` vale para
+    qualquer alerta e só esconde da lista de quem marcou.
+    """
+
+    __tablename__ = "alert_leituras"
+
+    alert_id: Mapped[str] = mapped_column(
+        String, ForeignKey("alerts.id", ondelete="CASCADE"), primary_key=True
+    )
+    profile_slug: Mapped[str] = mapped_column(String, primary_key=True)
+    lido: Mapped[bool] = mapped_column(Boolean, default=True)
+    oculto: Mapped[bool] = mapped_column(Boolean, default=False)
+    # última marcação feita pelo perfil
+    lido_em: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
@@ -1,12 +1,17 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, Boolean, Integer, DateTime, JSON, Text
+from sqlalchemy import String, Boolean, Integer, DateTime, JSON, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from app.database import Base
 
 
 class Enquete(Base):
     __tablename__ = "enquetes"
+    __table_args__ = (
+        # o agendador busca as próximas aberturas/encerramentos por aqui
+        Index("ix_enquetes_status_voting_starts_at", "status", "voting_starts_at"),
+        Index("ix_enquetes_status_closes_at", "status", "closes_at"),
+    )
 
     id: Mapped[str] = mapped_column(
         String, primary_key=True, default=lambda: str(uuid.uuid4())
@@ -29,6 +34,8 @@ class Enquete(Base):
     voting_starts_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     result_action: Mapped[str | None] = mapped_column(Text, nullable=True)
     respostas: Mapped[dict] = mapped_column(JSON, default=dict)
+    # resultado congelado no encerramento (ver app.apuracao.snapshot)
+    resultado: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
     )
@@ -1,12 +1,16 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, Text, DateTime, ForeignKey
+from sqlalchemy import String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from app.database import Base
 
 
 class EnqueteComentario(Base):
     __tablename__ = "enquete_comentarios"
+    __table_args__ = (
+        # paginação por (created_at, id) dentro de cada enquete
+        Index("ix_enquete_comentarios_enquete_created", "enquete_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String, primary_key=True, default=lambda: str(uuid.uuid4())
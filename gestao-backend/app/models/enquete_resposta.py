@@ -0,0 +1,32 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import String, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class EnqueteResposta(Base):
+    """Resposta de texto de uma bolinha (enquete de texto ou melhoria da escala).
+
+    Uma linha por bolinha, em vez do JSON enquetes.respostas, para respostas
+    simultâneas não sobrescreverem umas às outras.
+    """
+
+    __tablename__ = "enquete_respostas"
+    __table_args__ = (
+        UniqueConstraint("enquete_id", "cota_slug", name="uq_enquete_respostas_cota"),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    enquete_id: Mapped[str] = mapped_column(
+        String,
+        ForeignKey("enquetes.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    cota_slug: Mapped[str] = mapped_column(String, nullable=False)
+    texto: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
@@ -0,0 +1,36 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, Index, UniqueConstraint, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class EnqueteVoto(Base):
+    __tablename__ = "enquete_votos"
+    __table_args__ = (
+        UniqueConstraint("enquete_id", "cota_slug", "opcao_index", name="uq_enquete_votos_opcao"),
+        # enquetes de escolha única: no máximo um voto por bolinha
+        Index(
+            "uq_enquete_votos_escolha_unica",
+            "enquete_id",
+            "cota_slug",
+            unique=True,
+            sqlite_where=text("escolha_unica"),
+            postgresql_where=text("escolha_unica"),
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    enquete_id: Mapped[str] = mapped_column(
+        String,
+        ForeignKey("enquetes.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    cota_slug: Mapped[str] = mapped_column(String, nullable=False)
+    opcao_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    escolha_unica: Mapped[bool] = mapped_column(Boolean, default=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
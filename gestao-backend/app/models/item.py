@@ -14,15 +14,15 @@ class Item(Base):
     codigo: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
     nome: Mapped[str] = mapped_column(String, nullable=False)
     descricao: Mapped[str | None] = mapped_column(String, nullable=True)
-    space_slug: Mapped[str | None] = mapped_column(String, nullable=True)
+    space_slug: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
     container_especifico: Mapped[str | None] = mapped_column(String, nullable=True)
-    categoria: Mapped[str | None] = mapped_column(String, nullable=True)
-    tipo: Mapped[str] = mapped_column(String, default="comum")
-    estado: Mapped[str] = mapped_column(String, default="bom")
+    categoria: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
+    tipo: Mapped[str] = mapped_column(String, default="comum", index=True)
+    estado: Mapped[str] = mapped_column(String, default="bom", index=True)
     manual_cuidados: Mapped[str | None] = mapped_column(String, nullable=True)
     ciclo_manutencao: Mapped[str | None] = mapped_column(String, nullable=True)
     ultima_manutencao: Mapped[date | None] = mapped_column(Date, nullable=True)
-    proxima_manutencao: Mapped[date | None] = mapped_column(Date, nullable=True)
+    proxima_manutencao: Mapped[date | None] = mapped_column(Date, nullable=True, index=True)
     vezes_usado: Mapped[int] = mapped_column(Integer, default=0)
     tags: Mapped[list | None] = mapped_column(JSON, default=list)
     fotos: Mapped[list | None] = mapped_column(JSON, default=list)
@@ -30,7 +30,7 @@ class Item(Base):
     quantidade: Mapped[int | None] = mapped_column(Integer, nullable=True)
     valor_estimado: Mapped[float | None] = mapped_column(Float, nullable=True)
     responsavel: Mapped[str | None] = mapped_column(String, nullable=True)
-    disponibilidade: Mapped[str | None] = mapped_column(String, nullable=True)
+    disponibilidade: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
     origem: Mapped[str | None] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
@@ -1,12 +1,19 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, JSON
+from sqlalchemy import String, DateTime, Index, JSON
 from sqlalchemy.orm import Mapped, mapped_column
 from app.database import Base
 
 
 class Log(Base):
     __tablename__ = "logs"
+    __table_args__ = (
+        # listagem por (timestamp, id), com ou sem um dos filtros suportados
+        Index("ix_logs_timestamp_id", "timestamp", "id"),
+        Index("ix_logs_item_codigo_timestamp", "item_codigo", "timestamp", "id"),
+        Index("ix_logs_profile_slug_timestamp", "profile_slug", "timestamp", "id"),
+        Index("ix_logs_acao_timestamp", "acao", "timestamp", "id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String, primary_key=True, default=lambda: str(uuid.uuid4())
@@ -25,3 +32,5 @@ class Log(Base):
     fotos_evidencia: Mapped[list | None] = mapped_column(JSON, default=list)
     clima: Mapped[str | None] = mapped_column(String, nullable=True)
     sazonalidade: Mapped[str | None] = mapped_column(String, nullable=True)
+    # chave derivada do conteúdo para importações idempotentes (planilha)
+    source_key: Mapped[str | None] = mapped_column(String, nullable=True, unique=True, index=True)
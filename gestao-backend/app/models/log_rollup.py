@@ -0,0 +1,21 @@
+from datetime import date
+from sqlalchemy import Date, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class LogRollup(Base):
+    """Contagem diária de Logs por item, local, ação e perfil (ver app.log_rollups).
+
+    Dimensões ausentes no Log ficam como "" para a chave composta funcionar
+    com ON CONFLICT nos dois bancos.
+    """
+
+    __tablename__ = "log_rollups"
+
+    dia: Mapped[date] = mapped_column(Date, primary_key=True)
+    item_codigo: Mapped[str] = mapped_column(String, primary_key=True, default="")
+    local_uso: Mapped[str] = mapped_column(String, primary_key=True, default="")
+    acao: Mapped[str] = mapped_column(String, primary_key=True)
+    profile_slug: Mapped[str] = mapped_column(String, primary_key=True, default="")
+    total: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import String, Integer, DateTime, Text, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class OutboundEmail(Base):
+    __tablename__ = "outbound_emails"
+    __table_args__ = (
+        Index("ix_outbound_emails_status_proxima", "status", "proxima_tentativa"),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    para: Mapped[str] = mapped_column(String, nullable=False)
+    assunto: Mapped[str] = mapped_column(String, nullable=False)
+    html: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(String, default="pendente")
+    tentativas: Mapped[int] = mapped_column(Integer, default=0)
+    proxima_tentativa: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    erro: Mapped[str | None] = mapped_column(Text, nullable=True)
+    enviado_em: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
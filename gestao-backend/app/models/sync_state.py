@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class SyncState(Base):
+    """Última versão importada de cada planilha (ver app.sheet_sync)."""
+
+    __tablename__ = "sync_state"
+
+    fonte: Mapped[str] = mapped_column(String, primary_key=True)
+    etag: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String, nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String, nullable=True)
+    # chave da linha -> hash do conteúdo, para reprocessar só o que mudou
+    row_hashes: Mapped[dict] = mapped_column(JSON, default=dict)
+    synced_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,31 @@
+import base64
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+
+# Cursor das listagens com keyset (enquetes, comentários, logs): base64url de
+# "timestamp ISO|id" da última linha da página, devolvido em X-Next-Cursor.
+
+
+def encode_cursor(timestamp: datetime, row_id: str) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(timestamp), row_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def utcnow() -> datetime:
+    """Agora em UTC sem tzinfo, como as colunas DateTime guardam."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def as_utc(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,79 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", "2"))
+# quantos hashes podem esperar na fila além dos que já estão rodando
+BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", "16"))
+
+# bcrypt libera o GIL, então rodar em threads tira o custo do event loop
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+_stats = {"in_flight": 0, "completed": 0, "failed": 0, "rejected": 0, "rehashed": 0}
+
+
+class HasherBusy(Exception):
+    """A fila do bcrypt está cheia; quem chama responde 503."""
+
+
+async def _run(fn, *args):
+    if _stats["in_flight"] >= BCRYPT_MAX_WORKERS + BCRYPT_MAX_QUEUE:
+        _stats["rejected"] += 1
+        raise HasherBusy()
+    _stats["in_flight"] += 1
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    finally:
+        _stats["in_flight"] -= 1
+    _stats["completed"] += 1
+    return result
+
+
+def _hash_sync(password: str) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+
+def _verify_sync(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash_sync, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await _run(_verify_sync, password, hashed)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True se o hash foi gerado com um custo diferente de BCRYPT_ROUNDS."""
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def rehash_if_needed(password: str, hashed: str) -> str | None:
+    """Novo hash com o custo atual, ou None se o hash guardado já está em dia.
+
+    Chamar só depois de verify_password ter aceito a senha.
+    """
+    if not needs_rehash(hashed):
+        return None
+    new_hash = await hash_password(password)
+    _stats["rehashed"] += 1
+    return new_hash
+
+
+def stats() -> dict:
+    return {
+        **_stats,
+        "rounds": BCRYPT_ROUNDS,
+        "max_workers": BCRYPT_MAX_WORKERS,
+        "max_queue": BCRYPT_MAX_QUEUE,
+    }
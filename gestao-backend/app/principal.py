@@ -0,0 +1,92 @@
+import os
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.profile import Profile
+
+# por quanto tempo confiar no token_version/ativo lido do banco (segundos)
+PRINCIPAL_EPOCH_TTL = int(os.getenv("PRINCIPAL_EPOCH_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Usuário autenticado montado a partir dos claims verificados.
+
+    Basta para rotas que só precisam de slug/is_admin. Quem precisa da linha
+    completa (ex.: cota_slug) usa get_current_user, que carrega o Profile.
+    """
+
+    slug: str
+    nome: str | None = None
+    email: str | None = None
+    role: str | None = None
+    is_admin: bool = False
+    token_version: int = 0
+    source: str = "local"  # "local" (JWT próprio) ou "supabase"
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "Principal":
+        return cls(
+            slug=claims["sub"],
+            nome=claims.get("nome"),
+            email=claims.get("email"),
+            role=claims.get("role"),
+            is_admin=bool(claims.get("is_admin", False)),
+            token_version=int(claims.get("ver", 0)),
+            source="local",
+        )
+
+    @classmethod
+    def from_profile(cls, profile: Profile, source: str) -> "Principal":
+        return cls(
+            slug=profile.slug,
+            nome=profile.nome_curto or profile.nome_completo,
+            email=profile.email,
+            role=profile.role,
+            is_admin=bool(profile.is_admin),
+            token_version=profile.token_version or 0,
+            source=source,
+        )
+
+
+@dataclass(frozen=True)
+class _Epoch:
+    token_version: int
+    ativo: bool
+    checked_at: float
+
+
+class ProfileEpochs:
+    """token_version/ativo por slug, lidos do banco no máximo a cada TTL.
+
+    Dentro do processo a invalidação é imediata (forget); entre processos o
+    atraso máximo é o TTL.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._epochs: dict[str, _Epoch] = {}
+
+    async def get(self, db: AsyncSession, slug: str) -> _Epoch | None:
+        epoch = self._epochs.get(slug)
+        if epoch is not None and time.time() - epoch.checked_at < self.ttl:
+            return epoch
+        result = await db.execute(
+            select(Profile.token_version, Profile.ativo).where(Profile.slug == slug)
+        )
+        row = result.one_or_none()
+        if row is None:
+            self._epochs.pop(slug, None)
+            return None
+        epoch = _Epoch(token_version=row.token_version or 0, ativo=bool(row.ativo), checked_at=time.time())
+        self._epochs[slug] = epoch
+        return epoch
+
+    def forget(self, slug: str) -> None:
+        self._epochs.pop(slug, None)
+
+
+profile_epochs = ProfileEpochs(PRINCIPAL_EPOCH_TTL)
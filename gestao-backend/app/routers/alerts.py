@@ -1,29 +1,74 @@
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import case, delete, exists, or_, select
+from app.bulk import upsert
 from app.database import get_db
 from app.models.alert import Alert
+from app.models.alert_leitura import AlertLeitura
+from app.principal import Principal
+from app.routers.auth import get_principal
 from app.schemas.alert import AlertCreate, AlertUpdate, AlertResponse
 
 router = APIRouter(prefix="/api/alerts", tags=["alerts"])
 
 
+def _marcado(leitor: str, coluna):
+    return exists().where(
+        AlertLeitura.alert_id == Alert.id, AlertLeitura.profile_slug == leitor, coluna == True
+    )
+
+
+def _lido(leitor: str):
+    """`lido` do ponto de vista de `leitor`: alertas gerais (sem profile_slug)
+    olham alert_leituras, os de um perfil usam a própria coluna."""
+    return case((Alert.profile_slug.is_(None), _marcado(leitor, AlertLeitura.lido)), else_=Alert.lido)
+
+
+def _pode_alterar(alert: Alert, principal: Principal) -> bool:
+    """Alerta geral é de todos: só admin edita ou remove. O de um perfil,
+    o próprio perfil também."""
+    return principal.is_admin or (alert.profile_slug is not None and alert.profile_slug == principal.slug)
+
+
+async def _marcar(db: AsyncSession, alert: Alert, leitor: str, **estado: bool) -> None:
+    """Grava lido/oculto de `leitor` em alert_leituras, sem mexer no resto."""
+    row = {
+        "alert_id": alert.id, "profile_slug": leitor, "lido": False, "oculto": False,
+        "lido_em": datetime.now(timezone.utc), **estado,
+    }
+    await upsert(db, AlertLeitura, [row], key=["alert_id", "profile_slug"], update=[*estado, "lido_em"])
+
+
+def _response(alert: Alert, lido: bool) -> AlertResponse:
+    return AlertResponse.model_validate(alert).model_copy(update={"lido": bool(lido)})
+
+
 @router.get("", response_model=list[AlertResponse])
 async def list_alerts(
     profile_slug: str | None = Query(None),
     lido: bool | None = Query(None),
     tipo: str | None = Query(None),
     db: AsyncSession = Depends(get_db),
+    principal: Principal = Depends(get_principal),
 ):
-    query = select(Alert).order_by(Alert.created_at.desc())
+    """Alertas mais novos primeiro. Com profile_slug, inclui os gerais.
+    Os que o leitor ocultou não aparecem."""
+    leitor = profile_slug or principal.slug
+    lido_expr = _lido(leitor)
+    query = (
+        select(Alert, lido_expr)
+        .where(~_marcado(leitor, AlertLeitura.oculto))
+        .order_by(Alert.created_at.desc())
+    )
     if profile_slug:
-        query = query.where(Alert.profile_slug == profile_slug)
+        query = query.where(or_(Alert.profile_slug == profile_slug, Alert.profile_slug.is_(None)))
     if lido is not None:
-        query = query.where(Alert.lido == lido)
+        query = query.where(lido_expr == lido)
     if tipo:
         query = query.where(Alert.tipo == tipo)
     result = await db.execute(query)
-    return result.scalars().all()
+    return [_response(alert, lido_atual) for alert, lido_atual in result.all()]
 
 
 @router.post("", response_model=AlertResponse, status_code=201)
@@ -36,23 +81,45 @@ async def create_alert(data: AlertCreate, db: AsyncSession = Depends(get_db)):
 
 
 @router.put("/{alert_id}", response_model=AlertResponse)
-async def update_alert(alert_id: str, data: AlertUpdate, db: AsyncSession = Depends(get_db)):
+async def update_alert(
+    alert_id: str,
+    data: AlertUpdate,
+    db: AsyncSession = Depends(get_db),
+    principal: Principal = Depends(get_principal),
+):
     result = await db.execute(select(Alert).where(Alert.id == alert_id))
     alert = result.scalar_one_or_none()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
-    for key, value in data.model_dump(exclude_unset=True).items():
+    changes = data.model_dump(exclude_unset=True)
+    if "oculto" in changes:
+        await _marcar(db, alert, principal.slug, oculto=bool(changes.pop("oculto")))
+    if alert.profile_slug is None and "lido" in changes:
+        # alerta geral: marcar como lido vale só para quem está logado
+        await _marcar(db, alert, principal.slug, lido=bool(changes.pop("lido")))
+    if changes and not _pode_alterar(alert, principal):
+        raise HTTPException(status_code=403, detail="Sem permissão para alterar este alerta")
+    for key, value in changes.items():
         setattr(alert, key, value)
     await db.commit()
     await db.refresh(alert)
-    return alert
+    lido = (await db.execute(select(_lido(principal.slug)).where(Alert.id == alert.id))).scalar()
+    return _response(alert, lido)
 
 
 @router.delete("/{alert_id}", status_code=204)
-async def delete_alert(alert_id: str, db: AsyncSession = Depends(get_db)):
+async def delete_alert(
+    alert_id: str,
+    db: AsyncSession = Depends(get_db),
+    principal: Principal = Depends(get_principal),
+):
     result = await db.execute(select(Alert).where(Alert.id == alert_id))
     alert = result.scalar_one_or_none()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
+    if not _pode_alterar(alert, principal):
+        # quem não é admin esconde o alerta geral para si com {"oculto": true}
+        raise HTTPException(status_code=403, detail="Só administradores removem alertas gerais")
+    await db.execute(delete(AlertLeitura).where(AlertLeitura.alert_id == alert.id))
     await db.delete(alert)
     await db.commit()
@@ -1,17 +1,22 @@
 import os
-import re
+import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 
-import bcrypt
-import httpx
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from jose import JWTError, jwt
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import passwords, supabase_auth
 from app.database import get_db
+from app.mailer import enqueue_email, mailer
 from app.models.profile import Profile
+from app.principal import Principal, profile_epochs
+from app.slugs import add_with_unique_slug, profile_base_slug
+from app.token_cache import token_cache
 from app.schemas.auth import (
     LoginRequest,
     RegisterRequest,
@@ -29,20 +34,77 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 30
 RESET_TOKEN_EXPIRE_HOURS = 1
+# EventSource não manda header: o stream SSE recebe um token curto na URL
+STREAM_TOKEN_EXPIRE_SECONDS = int(os.getenv("STREAM_TOKEN_EXPIRE_SECONDS", "60"))
 
 APP_URL = os.getenv("APP_URL", "http://localhost:5173/terradecanaa")
-RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
-FROM_EMAIL = os.getenv("FROM_EMAIL", "noreply@terradecanaa.org")
 
-SUPABASE_URL = os.getenv("SUPABASE_URL", "")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "")
+def _token_exp(token: str) -> float | None:
+    """Lê o `exp` de um token já verificado, para limitar o tempo no cache."""
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return None
+    return float(exp) if exp is not None else None
+
+
+def _route_token(token: str) -> str | None:
+    """Escolhe o verificador olhando header/claims sem checar assinatura.
+
+    Tokens emitidos por _make_token não têm `iss`; os do Supabase sempre têm.
+    A assinatura é conferida depois, pelo verificador escolhido.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+        claims = jwt.get_unverified_claims(token)
+    except JWTError:
+        return None
+    if claims.get("iss"):
+        return "supabase" if supabase_auth.enabled() else None
+    if header.get("alg") == ALGORITHM and claims.get("sub"):
+        return "local"
+    return None
+
 
-def _hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+# latência por verificador: local, supabase_local, supabase_remote
+_verifier_stats: dict[str, dict] = {}
 
 
-def _verify(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+def _record_latency(name: str, start: float, ok: bool) -> None:
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stats = _verifier_stats.setdefault(
+        name, {"count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0}
+    )
+    stats["count"] += 1
+    if not ok:
+        stats["failures"] += 1
+    stats["total_ms"] += elapsed_ms
+    stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+
+def verifier_stats() -> dict:
+    return {
+        name: {
+            "count": s["count"],
+            "failures": s["failures"],
+            "avg_ms": round(s["total_ms"] / s["count"], 3) if s["count"] else 0.0,
+            "max_ms": round(s["max_ms"], 3),
+        }
+        for name, s in _verifier_stats.items()
+    }
+
+
+@contextmanager
+def _hasher_or_503():
+    """Fila do bcrypt cheia vira 503 com Retry-After."""
+    try:
+        yield
+    except passwords.HasherBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, tente novamente em instantes.",
+            headers={"Retry-After": "2"},
+        )
 
 
 def _make_token(payload: dict, expire_delta: timedelta) -> str:
@@ -51,18 +113,6 @@ def _make_token(payload: dict, expire_delta: timedelta) -> str:
     return jwt.encode(data, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def _send_email(to: str, subject: str, html: str) -> None:
-    if not RESEND_API_KEY:
-        return
-    async with httpx.AsyncClient() as client:
-        await client.post(
-            "https://api.resend.com/emails",
-            headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
-            json={"from": FROM_EMAIL, "to": [to], "subject": subject, "html": html},
-            timeout=10,
-        )
-
-
 @router.post("/login", response_model=TokenResponse)
 async def login(data: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Profile).where(Profile.email == data.email))
@@ -70,13 +120,30 @@ async def login(data: LoginRequest, db: AsyncSession = Depends(get_db)):
 
     if not profile or not profile.senha_hash:
         raise HTTPException(status_code=401, detail="Credenciais inválidas.")
-    if not _verify(data.senha, profile.senha_hash):
+    with _hasher_or_503():
+        valida = await passwords.verify_password(data.senha, profile.senha_hash)
+    if not valida:
         raise HTTPException(status_code=401, detail="Credenciais inválidas.")
     if not profile.ativo:
         raise HTTPException(status_code=403, detail="Perfil inativo.")
 
+    try:
+        new_hash = await passwords.rehash_if_needed(data.senha, profile.senha_hash)
+    except passwords.HasherBusy:
+        new_hash = None  # fila cheia: o rehash fica para o próximo login
+    if new_hash:
+        profile.senha_hash = new_hash
+        await db.commit()
+
     token = _make_token(
-        {"sub": profile.slug, "email": profile.email, "nome": profile.nome_curto or profile.nome_completo, "role": profile.role, "is_admin": profile.is_admin},
+        {
+            "sub": profile.slug,
+            "email": profile.email,
+            "nome": profile.nome_curto or profile.nome_completo,
+            "role": profile.role,
+            "is_admin": profile.is_admin,
+            "ver": profile.token_version or 0,
+        },
         timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS),
     )
     return TokenResponse(
@@ -103,7 +170,8 @@ async def request_reset(data: RequestResetRequest, db: AsyncSession = Depends(ge
     link = f"{APP_URL}/definir-senha?token={token}"
     nome = profile.nome_curto or profile.nome_completo
 
-    await _send_email(
+    enqueue_email(
+        db,
         to=profile.email,
         subject="Terra de Canaã — Acesso ao App",
         html=f"""
@@ -113,6 +181,8 @@ async def request_reset(data: RequestResetRequest, db: AsyncSession = Depends(ge
         <p style="color:#8A8A8A;font-size:12px">Este link expira em 1 hora.</p>
         """,
     )
+    await db.commit()
+    mailer.wake()
 
 
 @router.post("/reset-password", status_code=204)
@@ -134,7 +204,8 @@ async def reset_password(data: ResetPasswordRequest, db: AsyncSession = Depends(
     if len(data.nova_senha) < 6:
         raise HTTPException(status_code=422, detail="Senha deve ter no mínimo 6 caracteres.")
 
-    profile.senha_hash = _hash(data.nova_senha)
+    with _hasher_or_503():
+        profile.senha_hash = await passwords.hash_password(data.nova_senha)
     await db.commit()
 
 
@@ -149,29 +220,26 @@ async def register(data: RegisterRequest, db: AsyncSession = Depends(get_db)):
     if result.scalar_one_or_none():
         raise HTTPException(status_code=409, detail="Email já cadastrado.")
 
-    # Gerar slug
-    base_slug = re.sub(r"[^a-z0-9-]+", "", (data.slug or data.nome_completo).lower().strip().replace(" ", "-"))
-    slug = base_slug
-    counter = 2
-    while True:
-        result = await db.execute(select(Profile).where(Profile.slug == slug))
-        if not result.scalar_one_or_none():
-            break
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-
-    profile = Profile(
-        slug=slug,
-        nome_completo=data.nome_completo,
-        nome_curto=data.nome_curto,
-        email=data.email,
-        telefone=data.telefone,
-        senha_hash=_hash(data.senha),
-        ativo=True,
-        is_admin=False,
-    )
-    db.add(profile)
-    await db.commit()
+    with _hasher_or_503():
+        senha_hash = await passwords.hash_password(data.senha)
+    try:
+        profile = await add_with_unique_slug(
+            db,
+            Profile.slug,
+            profile_base_slug(data.slug or data.nome_completo),
+            lambda slug: Profile(
+                slug=slug,
+                nome_completo=data.nome_completo,
+                nome_curto=data.nome_curto,
+                email=data.email,
+                telefone=data.telefone,
+                senha_hash=senha_hash,
+                ativo=True,
+                is_admin=False,
+            ),
+        )
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Email já cadastrado.")
     await db.refresh(profile)
 
 
@@ -186,81 +254,150 @@ async def setup(data: SetupRequest, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=409, detail="Perfil já possui senha definida.")
     if len(data.nova_senha) < 6:
         raise HTTPException(status_code=422, detail="Senha deve ter no mínimo 6 caracteres.")
-    profile.senha_hash = _hash(data.nova_senha)
+    with _hasher_or_503():
+        profile.senha_hash = await passwords.hash_password(data.nova_senha)
     await db.commit()
 
 
-async def get_current_user(
+async def _profile_for_supabase_user(db: AsyncSession, user_data: dict) -> Profile | None:
+    email = user_data.get("email")
+    if not email:
+        return None
+    result = await db.execute(select(Profile).where(Profile.email == email))
+    profile = result.scalar_one_or_none()
+    if profile:
+        return profile if profile.ativo else None
+
+    # Auto-criar perfil se existe no Supabase mas não no backend
+    nome_completo = (user_data.get("user_metadata") or {}).get("nome_completo") or email.split("@")[0]
+    try:
+        profile = await add_with_unique_slug(
+            db,
+            Profile.slug,
+            profile_base_slug(nome_completo),
+            lambda slug: Profile(
+                id=str(uuid.uuid4()),
+                slug=slug,
+                nome_completo=nome_completo,
+                email=email,
+                ativo=True,
+                is_admin=False,
+            ),
+        )
+    except IntegrityError:
+        # Outro request criou o perfil deste email ao mesmo tempo
+        result = await db.execute(select(Profile).where(Profile.email == email))
+        profile = result.scalar_one_or_none()
+        return profile if profile and profile.ativo else None
+    await db.refresh(profile)
+    return profile
+
+
+async def _verify_token(token: str, db: AsyncSession) -> Principal:
+    verifier = _route_token(token)
+    if verifier is None:
+        raise HTTPException(status_code=401, detail="Token inválido ou expirado.")
+
+    if verifier == "supabase":
+        name = f"supabase_{supabase_auth.SUPABASE_VERIFY_MODE}"
+        start = time.perf_counter()
+        user_data = None
+        try:
+            user_data = await supabase_auth.get_user(token)
+        except Exception:
+            pass
+        _record_latency(name, start, ok=bool(user_data))
+        if user_data:
+            profile = await _profile_for_supabase_user(db, user_data)
+            if profile:
+                return Principal.from_profile(profile, source="supabase")
+        raise HTTPException(status_code=401, detail="Token inválido ou expirado.")
+
+    # Token JWT local legado (emitido por _make_token)
+    start = time.perf_counter()
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        _record_latency("local", start, ok=False)
+        raise HTTPException(status_code=401, detail="Token inválido ou expirado.")
+    _record_latency("local", start, ok=True)
+
+    if not payload.get("sub") or payload.get("purpose"):
+        raise HTTPException(status_code=401, detail="Token inválido.")
+    return Principal.from_claims(payload)
+
+
+async def get_principal(
     request: Request, db: AsyncSession = Depends(get_db)
-) -> Profile:
+) -> Principal:
+    """Autentica o request sem carregar o Profile (só claims + token_version)."""
     auth_header = request.headers.get("Authorization", "")
     if not auth_header.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Token não fornecido.")
 
     token = auth_header[7:]
 
-    # Tentar verificar como token Supabase primeiro
-    if SUPABASE_URL and SUPABASE_ANON_KEY:
-        try:
-            async with httpx.AsyncClient() as client:
-                res = await client.get(
-                    f"{SUPABASE_URL}/auth/v1/user",
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "apikey": SUPABASE_ANON_KEY,
-                    },
-                    timeout=10,
-                )
-                if res.status_code == 200:
-                    user_data = res.json()
-                    email = user_data.get("email")
-                    if email:
-                        result = await db.execute(select(Profile).where(Profile.email == email))
-                        profile = result.scalar_one_or_none()
-                        if profile and profile.ativo:
-                            return profile
-                        # Auto-criar perfil se existe no Supabase mas não no backend
-                        if not profile:
-                            nome_completo = user_data.get("user_metadata", {}).get("nome_completo") or email.split("@")[0]
-                            base_slug = re.sub(r"[^a-z0-9-]+", "", nome_completo.lower().strip().replace(" ", "-"))
-                            slug = base_slug
-                            counter = 2
-                            while True:
-                                result = await db.execute(select(Profile).where(Profile.slug == slug))
-                                if not result.scalar_one_or_none():
-                                    break
-                                slug = f"{base_slug}-{counter}"
-                                counter += 1
-                            profile = Profile(
-                                id=str(uuid.uuid4()),
-                                slug=slug,
-                                nome_completo=nome_completo,
-                                email=email,
-                                ativo=True,
-                                is_admin=False,
-                            )
-                            db.add(profile)
-                            await db.commit()
-                            await db.refresh(profile)
-                            return profile
-        except Exception:
-            pass
+    # Token já verificado recentemente: evita a ida ao Supabase
+    principal = token_cache.get(token)
+    if principal is None:
+        principal = await _verify_token(token, db)
+        token_cache.put(token, principal, _token_exp(token))
+
+    epoch = await profile_epochs.get(db, principal.slug)
+    if epoch is None or not epoch.ativo:
+        token_cache.invalidate_slug(principal.slug)
+        raise HTTPException(status_code=401, detail="Usuário não encontrado ou inativo.")
+    if epoch.token_version != principal.token_version:
+        token_cache.invalidate_slug(principal.slug)
+        if principal.source != "supabase":
+            raise HTTPException(status_code=401, detail="Sessão expirada, faça login novamente.")
+        # Perfil Supabase mudou (ex.: is_admin): remontar a partir do banco
+        principal = await _verify_token(token, db)
+        token_cache.put(token, principal, _token_exp(token))
+
+    return principal
+
+
+def make_stream_token(principal: Principal, enquete_id: str) -> str:
+    """Token de uso restrito ao stream de uma enquete, que pode ir na query string."""
+    return _make_token(
+        {"sub": principal.slug, "purpose": "stream", "enquete": enquete_id, "ver": principal.token_version},
+        timedelta(seconds=STREAM_TOKEN_EXPIRE_SECONDS),
+    )
+
 
-    # Fallback: verificar como token JWT local legado
+async def get_stream_principal(
+    enquete_id: str, token: str | None = Query(None), db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """Autentica o stream SSE pelo `?token=` emitido por make_stream_token.
+
+    O token só vale para a enquete da URL e expira rápido; como vai parar em
+    logs de acesso, não serve para mais nada.
+    """
+    if not token:
+        raise HTTPException(status_code=401, detail="Token não fornecido.")
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=401, detail="Token inválido ou expirado.")
+    if payload.get("purpose") != "stream" or payload.get("enquete") != enquete_id:
+        raise HTTPException(status_code=401, detail="Token inválido.")
 
     slug = payload.get("sub")
-    if not slug:
-        raise HTTPException(status_code=401, detail="Token inválido.")
+    epoch = await profile_epochs.get(db, slug)
+    if epoch is None or not epoch.ativo or epoch.token_version != payload.get("ver"):
+        raise HTTPException(status_code=401, detail="Usuário não encontrado ou inativo.")
+    return Principal(slug=slug, token_version=epoch.token_version)
 
-    result = await db.execute(select(Profile).where(Profile.slug == slug))
+
+async def get_current_user(
+    principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_db)
+) -> Profile:
+    """Carrega o Profile completo do usuário autenticado, para quem precisar dele."""
+    result = await db.execute(select(Profile).where(Profile.slug == principal.slug))
     profile = result.scalar_one_or_none()
     if not profile or not profile.ativo:
         raise HTTPException(status_code=401, detail="Usuário não encontrado ou inativo.")
-
     return profile
 
 
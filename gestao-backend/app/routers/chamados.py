@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from app.alert_fanout import broadcast_alert
+from app.audit_log import audit_log
 from app.database import get_db
 from app.models.chamado import Chamado
 from app.models.prestador import Prestador
-from app.models.alert import Alert
-from app.models.log import Log
 from app.schemas.chamado import ChamadoCreate, ChamadoUpdate, ChamadoResponse
 from urllib.parse import quote
 
@@ -42,17 +42,18 @@ async def create_chamado(data: ChamadoCreate, db: AsyncSession = Depends(get_db)
     )
     db.add(chamado)
     await db.flush()
-    db.add(Alert(
+    await broadcast_alert(
+        db,
         tipo="chamado",
         titulo=f"Chamado #{chamado.numero} aberto: {data.estrutura}",
         mensagem=data.descricao[:120] if data.descricao else None,
-    ))
-    db.add(Log(
-        acao="chamado_aberto",
-        descricao_incidente=f"#{chamado.numero} — {data.estrutura}: {data.descricao[:80] if data.descricao else ''}",
-    ))
+    )
     await db.commit()
     await db.refresh(chamado)
+    await audit_log.record(
+        acao="chamado_aberto",
+        descricao_incidente=f"#{chamado.numero} — {data.estrutura}: {data.descricao[:80] if data.descricao else ''}",
+    )
     return chamado
 
 
@@ -82,11 +83,12 @@ async def update_chamado(chamado_id: str, data: ChamadoUpdate, db: AsyncSession
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(chamado, key, value)
     if data.status and data.status != old_status and data.status == "concluido":
-        db.add(Alert(
+        await broadcast_alert(
+            db,
             tipo="chamado",
             titulo=f"Chamado #{chamado.numero} concluído",
             mensagem=chamado.resolucao,
-        ))
+        )
     await db.commit()
     await db.refresh(chamado)
     return chamado
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from app import cotas_cache
 from app.database import get_db
 from app.models.cota import Cota
 from app.schemas.cota import CotaCreate, CotaUpdate, CotaResponse
@@ -29,6 +30,7 @@ async def create_cota(data: CotaCreate, db: AsyncSession = Depends(get_db)):
     db.add(cota)
     await db.commit()
     await db.refresh(cota)
+    cotas_cache.invalidate()
     return cota
 
 
@@ -42,6 +44,7 @@ async def update_cota(slug: str, data: CotaUpdate, db: AsyncSession = Depends(ge
         setattr(cota, key, value)
     await db.commit()
     await db.refresh(cota)
+    cotas_cache.invalidate()
     return cota
 
 
@@ -53,3 +56,4 @@ async def delete_cota(slug: str, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Cota not found")
     await db.delete(cota)
     await db.commit()
+    cotas_cache.invalidate()
@@ -1,18 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.orm import defer
+from app.alert_fanout import broadcast_alert_later
+from app.apuracao import STATUS_ENCERRADA, Apuracao, apurar, compute_result
+from app.audit_log import audit_log
+from app.bulk import dialect_insert
+from app.cotas_cache import active_cotas_count
 from app.database import get_db
+from app.enquete_scheduler import enquete_scheduler, freeze_result
+from app.enquete_stream import enquete_broker
 from app.models.enquete import Enquete
 from app.models.enquete_comentario import EnqueteComentario
-from app.models.cota import Cota
-from app.models.log import Log
-from app.models.alert import Alert
+from app.models.enquete_resposta import EnqueteResposta
+from app.models.enquete_voto import EnqueteVoto
 from app.schemas.enquete import (
-    EnqueteCreate, EnqueteUpdate, VotoCreate, EnqueteResponse,
+    EnqueteCreate, EnqueteUpdate, VotoCreate, EnqueteResponse, EnqueteSummary,
     ComentarioCreate, ComentarioResponse,
 )
-from app.routers.auth import get_current_user
+from app.principal import Principal
+from app.routers.auth import get_current_user, get_principal, get_stream_principal, make_stream_token
 from app.models.profile import Profile
+from app.pagination import as_utc, decode_cursor, encode_cursor, utcnow
 from pydantic import BaseModel
 
 
@@ -20,68 +31,161 @@ class RespostaCreate(BaseModel):
     texto: str
 
 router = APIRouter(prefix="/api/enquetes", tags=["enquetes"])
+# fora do Depends(get_principal) do include_router: EventSource não manda o
+# header Authorization, então o stream se autentica pelo ?token= da URL
+stream_router = APIRouter(prefix="/api/enquetes", tags=["enquetes"])
 
 OPCOES_BINARIA = ["Sim", "Não", "Abstenção"]
 OPCOES_ESCALA = ["1", "2", "3", "4", "5"]
+# página padrão das listagens; o resto vem pelo X-Next-Cursor
+ENQUETES_PAGE_SIZE = 50
+COMENTARIOS_PAGE_SIZE = 100
+
+
+_DERIVADOS = {
+    "votos", "votantes", "total_votos", "votantes_count", "respostas",
+    "quorum_percent", "quorum_met", "approval_percent", "approved",
+}
+
+
+def _response(schema, enquete: Enquete, apuracao: Apuracao, active_cotas: int):
+    """Monta EnqueteResponse/EnqueteSummary lendo só as colunas que o schema usa."""
+    data = {k: getattr(enquete, k) for k in schema.model_fields if k not in _DERIVADOS}
+    data.update(
+        votos=apuracao.votos,
+        votantes=apuracao.votantes,
+        respostas=apuracao.respostas,
+        total_votos=sum(apuracao.votos.values()),
+        votantes_count=apuracao.votantes_count,
+        **(apuracao.congelado or compute_result(enquete, apuracao, active_cotas)),
+    )
+    return schema.model_validate({k: v for k, v in data.items() if k in schema.model_fields})
 
 
-def _compute_result(enquete: Enquete, active_cotas: int) -> dict:
-    if enquete.tipo == "texto":
-        votantes_count = len(enquete.respostas) if enquete.respostas else 0
-    else:
-        votantes_count = len(enquete.votantes) if enquete.votantes else 0
-    quorum_percent = round((votantes_count / active_cotas) * 100) if active_cotas > 0 else 0
-    quorum_met = quorum_percent >= enquete.quorum_required
-
-    approval_percent: int | None = None
-    approved: bool | None = None
-
-    votos = enquete.votos or {}
-
-    if enquete.tipo == "binaria":
-        sim = int(votos.get("0", 0))
-        nao = int(votos.get("1", 0))
-        validos = sim + nao
-        if validos > 0:
-            approval_percent = round((sim / validos) * 100)
-        else:
-            approval_percent = 0
-        approved = quorum_met and approval_percent >= enquete.approval_threshold
-    elif enquete.status in ("encerrada", "implementada", "arquivada"):
-        # for multipla: any voting counts as "approved" if quorum met
-        approved = quorum_met
+async def _enquete_response(db: AsyncSession, enquete: Enquete) -> EnqueteResponse:
+    apuracoes = await apurar(db, [enquete])
+    active_cotas = await active_cotas_count(db)
+    return _response(EnqueteResponse, enquete, apuracoes[enquete.id], active_cotas)
 
+
+def _tally(resp: EnqueteResponse) -> dict:
+    """Evento publicado no stream SSE: só as contagens, sem votantes/respostas."""
     return {
-        "quorum_percent": quorum_percent,
-        "quorum_met": quorum_met,
-        "approval_percent": approval_percent,
-        "approved": approved,
+        "id": resp.id,
+        "status": resp.status,
+        "votos": resp.votos,
+        "total_votos": resp.total_votos,
+        "votantes_count": resp.votantes_count,
+        "quorum_percent": resp.quorum_percent,
+        "quorum_met": resp.quorum_met,
+        "approval_percent": resp.approval_percent,
+        "approved": resp.approved,
     }
 
 
-async def _active_cotas_count(db: AsyncSession) -> int:
-    result = await db.execute(select(func.count()).select_from(Cota).where(Cota.ativo == True))
-    return result.scalar_one() or 1
+async def _page(
+    db: AsyncSession,
+    response: Response,
+    query,
+    status: str | None,
+    categoria: str | None,
+    tipo: str | None,
+    cursor: str | None,
+    limit: int,
+) -> list[Enquete]:
+    """Aplica filtros e paginação por cursor (created_at, id), mais novas primeiro.
+
+    Sempre devolve uma página; o cursor da próxima vai no header X-Next-Cursor.
+    """
+    query = query.order_by(Enquete.created_at.desc(), Enquete.id.desc())
+    if status:
+        query = query.where(Enquete.status == status)
+    if categoria:
+        query = query.where(Enquete.categoria == categoria)
+    if tipo:
+        query = query.where(Enquete.tipo == tipo)
+    if cursor:
+        created_at, enquete_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Enquete.created_at < created_at,
+            and_(Enquete.created_at == created_at, Enquete.id < enquete_id),
+        ))
+    result = await db.execute(query.limit(limit + 1))
+    enquetes = list(result.scalars().all())
+    if len(enquetes) > limit:
+        enquetes = enquetes[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(enquetes[-1].created_at, enquetes[-1].id)
+    return enquetes
 
 
 @router.get("", response_model=list[EnqueteResponse])
-async def list_enquetes(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Enquete).order_by(Enquete.created_at.desc()))
-    enquetes = result.scalars().all()
-    active_cotas = await _active_cotas_count(db)
+async def list_enquetes(
+    response: Response,
+    status: str | None = Query(None),
+    categoria: str | None = Query(None),
+    tipo: str | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int = Query(ENQUETES_PAGE_SIZE, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+):
+    query = select(Enquete).options(defer(Enquete.votos), defer(Enquete.votantes))
+    enquetes = await _page(db, response, query, status, categoria, tipo, cursor, limit)
+    active_cotas = await active_cotas_count(db)
+    apuracoes = await apurar(db, enquetes)
+    return [_response(EnqueteResponse, e, apuracoes[e.id], active_cotas) for e in enquetes]
+
+
+@router.get("/summary", response_model=list[EnqueteSummary])
+async def list_enquetes_summary(
+    response: Response,
+    status: str | None = Query(None),
+    categoria: str | None = Query(None),
+    tipo: str | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int = Query(ENQUETES_PAGE_SIZE, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+):
+    """Visão leve para o Dashboard: contagens e quórum, sem votos por bolinha
+    nem respostas de texto."""
+    query = select(Enquete).options(
+        defer(Enquete.votos),
+        defer(Enquete.votantes),
+        defer(Enquete.respostas),
+        defer(Enquete.descricao),
+        defer(Enquete.result_action),
+    )
+    enquetes = await _page(db, response, query, status, categoria, tipo, cursor, limit)
+    active_cotas = await active_cotas_count(db)
+    apuracoes = await apurar(db, enquetes, com_votantes=False)
+    return [_response(EnqueteSummary, e, apuracoes[e.id], active_cotas) for e in enquetes]
+
 
-    out = []
-    for e in enquetes:
-        data = EnqueteResponse.model_validate(e)
-        computed = _compute_result(e, active_cotas)
-        for k, v in computed.items():
-            setattr(data, k, v)
-        out.append(data)
-    return out
+@router.get("/comment-counts", response_model=dict[str, int])
+async def comment_counts(
+    ids: str = Query(..., description="ids de enquetes separados por vírgula"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Quantidade de comentários por enquete, para a lista, numa só consulta."""
+    enquete_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if len(enquete_ids) > 200:
+        raise HTTPException(status_code=400, detail="Máximo de 200 ids por consulta")
+    counts = dict.fromkeys(enquete_ids, 0)
+    if enquete_ids:
+        result = await db.execute(
+            select(EnqueteComentario.enquete_id, func.count())
+            .where(EnqueteComentario.enquete_id.in_(enquete_ids))
+            .group_by(EnqueteComentario.enquete_id)
+        )
+        counts.update(result.all())
+    return counts
 
 
 @router.post("", response_model=EnqueteResponse, status_code=201)
-async def create_enquete(data: EnqueteCreate, db: AsyncSession = Depends(get_db)):
+async def create_enquete(
+    data: EnqueteCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
     if data.tipo == "binaria":
         opcoes = OPCOES_BINARIA
     elif data.tipo == "escala":
@@ -106,27 +210,34 @@ async def create_enquete(data: EnqueteCreate, db: AsyncSession = Depends(get_db)
     db.add(enquete)
     await db.commit()
     await db.refresh(enquete)
+    if enquete.voting_starts_at or enquete.closes_at:
+        enquete_scheduler.wake()
 
-    db.add(Log(
+    await audit_log.record(
         acao="enquete_criada",
         profile_slug=data.criador,
         descricao_incidente=f"Enquete criada: {enquete.titulo}",
-    ))
-    profiles_result = await db.execute(select(Profile).where(Profile.ativo == True))
-    for p in profiles_result.scalars().all():
-        db.add(Alert(
-            tipo="enquete",
-            profile_slug=p.slug,
-            titulo=f"Nova enquete: {enquete.titulo}",
-            mensagem="Uma nova enquete foi criada e aguarda sua participação.",
-        ))
-    await db.commit()
+    )
+    background_tasks.add_task(
+        broadcast_alert_later,
+        tipo="enquete",
+        titulo=f"Nova enquete: {enquete.titulo}",
+        mensagem="Uma nova enquete foi criada e aguarda sua participação.",
+    )
 
-    active_cotas = await _active_cotas_count(db)
-    response = EnqueteResponse.model_validate(enquete)
-    for k, v in _compute_result(enquete, active_cotas).items():
-        setattr(response, k, v)
-    return response
+    return await _enquete_response(db, enquete)
+
+
+def _check_janela(enquete: Enquete) -> None:
+    """Recusa voto/resposta fora de voting_starts_at..closes_at, mesmo antes de
+    o agendador mudar o status."""
+    now = utcnow()
+    starts_at = as_utc(enquete.voting_starts_at)
+    closes_at = as_utc(enquete.closes_at)
+    if starts_at and now < starts_at:
+        raise HTTPException(status_code=400, detail="A votação desta enquete ainda não começou")
+    if closes_at and now >= closes_at:
+        raise HTTPException(status_code=400, detail="O prazo desta enquete já terminou")
 
 
 @router.post("/{enquete_id}/votar", response_model=EnqueteResponse)
@@ -142,6 +253,7 @@ async def votar(
         raise HTTPException(status_code=404, detail="Enquete not found")
     if enquete.status not in ("aberta", "votacao"):
         raise HTTPException(status_code=400, detail="Enquete não está aberta para votação")
+    _check_janela(enquete)
     if data.opcao_index < 0 or data.opcao_index >= len(enquete.opcoes):
         raise HTTPException(status_code=400, detail="Opção inválida")
 
@@ -149,41 +261,38 @@ async def votar(
         raise HTTPException(status_code=400, detail="Usuário não pertence a uma bolinha")
 
     cota_slug = current_user.cota_slug
-    votantes = dict(enquete.votantes)
-    votos = dict(enquete.votos)
-
-    if enquete.tipo == "binaria" or not enquete.multipla_escolha:
-        if cota_slug in votantes:
+    escolha_unica = enquete.tipo == "binaria" or not enquete.multipla_escolha
+
+    # As constraints UNIQUE de enquete_votos garantem um voto por bolinha
+    # (ou por opção, na múltipla escolha) mesmo com votos simultâneos
+    db.add(EnqueteVoto(
+        enquete_id=enquete.id,
+        cota_slug=cota_slug,
+        opcao_index=data.opcao_index,
+        escolha_unica=escolha_unica,
+    ))
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        if escolha_unica:
             raise HTTPException(status_code=409, detail="Bolinha já votou nesta enquete")
-        votantes[cota_slug] = [data.opcao_index]
-    else:
-        if cota_slug in votantes:
-            if data.opcao_index in votantes[cota_slug]:
-                raise HTTPException(status_code=409, detail="Bolinha já votou nesta opção")
-            votantes[cota_slug].append(data.opcao_index)
-        else:
-            votantes[cota_slug] = [data.opcao_index]
-
-    key = str(data.opcao_index)
-    votos[key] = votos.get(key, 0) + 1
-
-    enquete.votos = votos
-    enquete.votantes = votantes
-    enquete.total_votos = sum(votos.values())
+        raise HTTPException(status_code=409, detail="Bolinha já votou nesta opção")
 
     if enquete.tipo == "escala" and data.melhoria:
-        respostas = dict(enquete.respostas or {})
-        respostas[cota_slug] = data.melhoria[:300]
-        enquete.respostas = respostas
+        # na escala de múltipla escolha fica a primeira melhoria da bolinha
+        await db.execute(
+            dialect_insert(db)(EnqueteResposta)
+            .values(enquete_id=enquete.id, cota_slug=cota_slug, texto=data.melhoria[:300])
+            .on_conflict_do_nothing()
+        )
 
     await db.commit()
     await db.refresh(enquete)
 
-    active_cotas = await _active_cotas_count(db)
-    response = EnqueteResponse.model_validate(enquete)
-    for k, v in _compute_result(enquete, active_cotas).items():
-        setattr(response, k, v)
-    return response
+    resp = await _enquete_response(db, enquete)
+    enquete_broker.publish(enquete.id, _tally(resp))
+    return resp
 
 
 @router.post("/{enquete_id}/responder", response_model=EnqueteResponse)
@@ -201,24 +310,61 @@ async def responder(
         raise HTTPException(status_code=400, detail="Enquete não é do tipo texto")
     if enquete.status not in ("aberta", "votacao"):
         raise HTTPException(status_code=400, detail="Enquete não está aberta para respostas")
+    _check_janela(enquete)
     if not current_user.cota_slug:
         raise HTTPException(status_code=400, detail="Usuário não pertence a uma bolinha")
 
-    cota_slug = current_user.cota_slug
-    if cota_slug in (enquete.respostas or {}):
+    # a constraint UNIQUE de enquete_respostas garante uma resposta por bolinha
+    db.add(EnqueteResposta(enquete_id=enquete.id, cota_slug=current_user.cota_slug, texto=data.texto[:300]))
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(status_code=409, detail="Bolinha já respondeu esta enquete")
-    respostas = dict(enquete.respostas or {})
-    respostas[cota_slug] = data.texto[:300]
-    enquete.respostas = respostas
 
     await db.commit()
     await db.refresh(enquete)
 
-    active_cotas = await _active_cotas_count(db)
-    response = EnqueteResponse.model_validate(enquete)
-    for k, v in _compute_result(enquete, active_cotas).items():
-        setattr(response, k, v)
-    return response
+    resp = await _enquete_response(db, enquete)
+    enquete_broker.publish(enquete.id, _tally(resp))
+    return resp
+
+
+@router.post("/{enquete_id}/stream-token")
+async def create_stream_token(
+    enquete_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_principal),
+):
+    """Token curto para abrir o stream: GET /stream?token=..."""
+    result = await db.execute(select(Enquete.id).where(Enquete.id == enquete_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Enquete not found")
+    return {"token": make_stream_token(current_user, enquete_id)}
+
+
+@stream_router.get("/{enquete_id}/stream")
+async def stream_enquete(
+    enquete_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    _: Principal = Depends(get_stream_principal),
+):
+    """Server-Sent Events com a apuração da enquete a cada voto/resposta."""
+    result = await db.execute(select(Enquete).where(Enquete.id == enquete_id))
+    enquete = result.scalar_one_or_none()
+    if not enquete:
+        raise HTTPException(status_code=404, detail="Enquete not found")
+    inicial = _tally(await _enquete_response(db, enquete))
+    # devolve a conexão ao pool: o stream pode ficar aberto a assembleia toda
+    await db.close()
+
+    enquete_broker.check_capacity()
+    return StreamingResponse(
+        enquete_broker.events(enquete_id, request, inicial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.put("/{enquete_id}", response_model=EnqueteResponse)
@@ -226,7 +372,7 @@ async def update_enquete(
     enquete_id: str,
     data: EnqueteUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: Profile = Depends(get_current_user),
+    current_user: Principal = Depends(get_principal),
 ):
     result = await db.execute(select(Enquete).where(Enquete.id == enquete_id))
     enquete = result.scalar_one_or_none()
@@ -234,23 +380,28 @@ async def update_enquete(
         raise HTTPException(status_code=404, detail="Enquete not found")
     if not current_user.is_admin and enquete.criador != current_user.slug:
         raise HTTPException(status_code=403, detail="Apenas o criador ou um administrador pode editar esta enquete.")
-    for key, value in data.model_dump(exclude_unset=True).items():
+    old_status = enquete.status
+    changes = data.model_dump(exclude_unset=True)
+    for key, value in changes.items():
         setattr(enquete, key, value)
+    if enquete.status != old_status:
+        if enquete.status in STATUS_ENCERRADA and not enquete.resultado:
+            await freeze_result(db, [enquete])
+        elif enquete.status not in STATUS_ENCERRADA:
+            enquete.resultado = None
     await db.commit()
     await db.refresh(enquete)
+    if {"status", "voting_starts_at", "closes_at"} & changes.keys():
+        enquete_scheduler.wake()
 
-    active_cotas = await _active_cotas_count(db)
-    response = EnqueteResponse.model_validate(enquete)
-    for k, v in _compute_result(enquete, active_cotas).items():
-        setattr(response, k, v)
-    return response
+    return await _enquete_response(db, enquete)
 
 
 @router.delete("/{enquete_id}", status_code=204)
 async def delete_enquete(
     enquete_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: Profile = Depends(get_current_user),
+    current_user: Principal = Depends(get_principal),
 ):
     result = await db.execute(select(Enquete).where(Enquete.id == enquete_id))
     enquete = result.scalar_one_or_none()
@@ -258,18 +409,41 @@ async def delete_enquete(
         raise HTTPException(status_code=404, detail="Enquete not found")
     if not current_user.is_admin and enquete.criador != current_user.slug:
         raise HTTPException(status_code=403, detail="Apenas o criador ou um administrador pode excluir esta enquete.")
+    await db.execute(delete(EnqueteVoto).where(EnqueteVoto.enquete_id == enquete_id))
+    await db.execute(delete(EnqueteResposta).where(EnqueteResposta.enquete_id == enquete_id))
     await db.delete(enquete)
     await db.commit()
 
 
 @router.get("/{enquete_id}/comentarios", response_model=list[ComentarioResponse])
-async def list_comentarios(enquete_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
+async def list_comentarios(
+    enquete_id: str,
+    response: Response,
+    cursor: str | None = Query(None),
+    limit: int = Query(COMENTARIOS_PAGE_SIZE, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+):
+    """Comentários em ordem cronológica, paginados por (created_at, id).
+
+    O cursor da próxima página vem no header X-Next-Cursor.
+    """
+    query = (
         select(EnqueteComentario)
         .where(EnqueteComentario.enquete_id == enquete_id)
-        .order_by(EnqueteComentario.created_at.asc())
+        .order_by(EnqueteComentario.created_at.asc(), EnqueteComentario.id.asc())
     )
-    return result.scalars().all()
+    if cursor:
+        created_at, comentario_id = decode_cursor(cursor)
+        query = query.where(or_(
+            EnqueteComentario.created_at > created_at,
+            and_(EnqueteComentario.created_at == created_at, EnqueteComentario.id > comentario_id),
+        ))
+    result = await db.execute(query.limit(limit + 1))
+    comentarios = list(result.scalars().all())
+    if len(comentarios) > limit:
+        comentarios = comentarios[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(comentarios[-1].created_at, comentarios[-1].id)
+    return comentarios
 
 
 @router.post("/{enquete_id}/comentarios", response_model=ComentarioResponse, status_code=201)
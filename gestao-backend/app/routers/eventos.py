@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
+from app.alert_fanout import broadcast_alert
+from app.audit_log import audit_log
 from app.database import get_db
 from app.models.evento import Evento
 from app.models.booking import Booking
-from app.models.alert import Alert
-from app.models.log import Log
 from app.schemas.evento import EventoCreate, EventoUpdate, EventoResponse
 
 router = APIRouter(prefix="/api/eventos", tags=["eventos"])
@@ -27,6 +27,7 @@ async def list_eventos(
 async def create_evento(data: EventoCreate, db: AsyncSession = Depends(get_db)):
     evento = Evento(**data.model_dump())
     db.add(evento)
+    booking_id = None
 
     if data.local_slug:
         overlap_query = select(Booking).where(
@@ -59,24 +60,23 @@ async def create_evento(data: EventoCreate, db: AsyncSession = Depends(get_db)):
         db.add(booking)
         await db.flush()
         await db.refresh(booking)
-        db.add(
-            Alert(
-                tipo="reserva",
-                titulo=f"Reserva automática: {data.local_slug}",
-                mensagem=f"Evento '{data.titulo}' — {data.data_inicio.strftime('%d/%m/%Y')} a {data.data_fim.strftime('%d/%m/%Y')}",
-            )
-        )
-        db.add(
-            Log(
-                acao="reserva_criada",
-                profile_slug=data.criador_slug or "sistema",
-                booking_id=booking.id,
-                local_uso=data.local_slug,
-            )
+        await broadcast_alert(
+            db,
+            tipo="reserva",
+            titulo=f"Reserva automática: {data.local_slug}",
+            mensagem=f"Evento '{data.titulo}' — {data.data_inicio.strftime('%d/%m/%Y')} a {data.data_fim.strftime('%d/%m/%Y')}",
         )
+        booking_id = booking.id
 
     await db.commit()
     await db.refresh(evento)
+    if booking_id:
+        await audit_log.record(
+            acao="reserva_criada",
+            profile_slug=data.criador_slug or "sistema",
+            booking_id=booking_id,
+            local_uso=data.local_slug,
+        )
     return evento
 
 
@@ -2,13 +2,19 @@ import csv
 import io
 import os
 import re
-import httpx
+import time
+from collections import OrderedDict
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, literal, select, union_all
+from app.bulk import upsert
 from app.database import get_db
+from app.item_search import reindex, search
+from app.maintenance import due_query
 from app.models.item import Item
-from app.schemas.item import ItemCreate, ItemUpdate, ItemResponse
+from app.sheet_sync import diff_rows, download, load_state, save_state, validators_changed
+from app.slugs import next_free_slug
+from app.schemas.item import ItemCreate, ItemUpdate, ItemResponse, ItemFacets
 
 router = APIRouter(prefix="/api/items", tags=["items"])
 
@@ -46,15 +52,7 @@ def _parse_valor(val: str) -> float | None:
         return None
 
 
-@router.get("", response_model=list[ItemResponse])
-async def list_items(
-    categoria: str | None = Query(None),
-    estado: str | None = Query(None),
-    space_slug: str | None = Query(None),
-    tipo: str | None = Query(None),
-    db: AsyncSession = Depends(get_db),
-):
-    query = select(Item).order_by(Item.nome)
+def _filtrar(query, categoria, estado, space_slug, tipo):
     if categoria:
         query = query.where(Item.categoria == categoria)
     if estado:
@@ -63,10 +61,114 @@ async def list_items(
         query = query.where(Item.space_slug == space_slug)
     if tipo:
         query = query.where(Item.tipo == tipo)
+    return query
+
+
+@router.get("", response_model=list[ItemResponse])
+async def list_items(
+    categoria: str | None = Query(None),
+    estado: str | None = Query(None),
+    space_slug: str | None = Query(None),
+    tipo: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    query = _filtrar(select(Item).order_by(Item.nome), categoria, estado, space_slug, tipo)
     result = await db.execute(query)
     return result.scalars().all()
 
 
+_FACETAS = ("categoria", "estado", "space_slug", "tipo", "disponibilidade")
+
+# Contagens por faceta, por combinação de filtros; invalidado a cada escrita.
+# LRU: os filtros vêm da query string, então o número de chaves é limitado aqui
+_facets_cache: OrderedDict[tuple, tuple[ItemFacets, float]] = OrderedDict()
+FACETS_CACHE_TTL = 300  # 5 minutos
+FACETS_CACHE_MAX_ENTRIES = int(os.getenv("FACETS_CACHE_MAX_ENTRIES", "256"))
+
+
+def _invalidate_facets() -> None:
+    _facets_cache.clear()
+
+
+def _facets_get(key: tuple, now: float) -> ItemFacets | None:
+    cached = _facets_cache.get(key)
+    if cached is None:
+        return None
+    if now - cached[1] >= FACETS_CACHE_TTL:
+        del _facets_cache[key]
+        return None
+    _facets_cache.move_to_end(key)
+    return cached[0]
+
+
+def _facets_put(key: tuple, data: ItemFacets, now: float) -> None:
+    _facets_cache[key] = (data, now)
+    _facets_cache.move_to_end(key)
+    while len(_facets_cache) > FACETS_CACHE_MAX_ENTRIES:
+        _facets_cache.popitem(last=False)
+
+
+@router.get("/facets", response_model=ItemFacets)
+async def item_facets(
+    categoria: str | None = Query(None),
+    estado: str | None = Query(None),
+    space_slug: str | None = Query(None),
+    tipo: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Quantos itens há por categoria, estado, espaço, tipo e disponibilidade,
+    com os mesmos filtros de list_items. Uma consulta (UNION ALL dos GROUP BY)."""
+    key = (categoria, estado, space_slug, tipo)
+    now = time.time()
+    cached = _facets_get(key, now)
+    if cached is not None:
+        return cached
+
+    grupos = [
+        _filtrar(
+            select(literal(nome).label("faceta"), getattr(Item, nome).label("valor"), func.count().label("total")),
+            categoria, estado, space_slug, tipo,
+        ).group_by(getattr(Item, nome))
+        for nome in _FACETAS
+    ]
+    result = await db.execute(union_all(*grupos))
+
+    facets: dict[str, list[dict]] = {nome: [] for nome in _FACETAS}
+    for faceta, valor, total in result:
+        facets[faceta].append({"valor": valor, "total": total})
+    for contagens in facets.values():
+        contagens.sort(key=lambda c: (-c["total"], c["valor"] or ""))
+    data = ItemFacets(total=sum(c["total"] for c in facets["tipo"]), **facets)
+    _facets_put(key, data, now)
+    return data
+
+
+@router.get("/search", response_model=list[ItemResponse])
+async def search_items(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Busca por nome, descrição, tags, código e responsável, sem acento e
+    por prefixo ("fura" acha "Furadeira"), dos mais relevantes aos menos."""
+    codigos = await search(db, q, limit)
+    if not codigos:
+        return []
+    result = await db.execute(select(Item).where(Item.codigo.in_(codigos)))
+    by_codigo = {item.codigo: item for item in result.scalars().all()}
+    return [by_codigo[c] for c in codigos if c in by_codigo]
+
+
+@router.get("/maintenance-due", response_model=list[ItemResponse])
+async def maintenance_due(
+    within_days: int = Query(7, ge=0, le=365),
+    db: AsyncSession = Depends(get_db),
+):
+    """Itens com manutenção vencida ou prevista para os próximos `within_days` dias."""
+    result = await db.execute(due_query(within_days))
+    return result.scalars().all()
+
+
 @router.get("/{codigo}", response_model=ItemResponse)
 async def get_item(codigo: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Item).where(Item.codigo == codigo))
@@ -80,7 +182,10 @@ async def get_item(codigo: str, db: AsyncSession = Depends(get_db)):
 async def create_item(data: ItemCreate, db: AsyncSession = Depends(get_db)):
     item = Item(**data.model_dump())
     db.add(item)
+    await db.flush()
+    await reindex(db, [item.codigo])
     await db.commit()
+    _invalidate_facets()
     await db.refresh(item)
     return item
 
@@ -93,7 +198,10 @@ async def update_item(codigo: str, data: ItemUpdate, db: AsyncSession = Depends(
         raise HTTPException(status_code=404, detail="Item not found")
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(item, key, value)
+    await db.flush()
+    await reindex(db, [codigo])
     await db.commit()
+    _invalidate_facets()
     await db.refresh(item)
     return item
 
@@ -105,85 +213,120 @@ async def delete_item(codigo: str, db: AsyncSession = Depends(get_db)):
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     await db.delete(item)
+    await db.flush()
+    await reindex(db, [codigo])
     await db.commit()
+    _invalidate_facets()
+
+
+# Colunas que a planilha controla; o resto (manutenção, fotos, uso) é do app
+_SHEET_COLUMNS = [
+    "nome", "descricao", "categoria", "space_slug", "estado", "responsavel",
+    "valor_estimado", "disponibilidade", "origem", "quantidade",
+]
+
+
+def _parse_acervo_row(row: list[str]) -> dict | None:
+    """Converte uma linha da planilha nos campos do Item (sem o código)."""
+    def col(idx: int) -> str:
+        return row[idx].strip() if idx < len(row) else ""
+
+    nome = col(1)
+    if not nome:
+        return None
+
+    categoria_slug = _slugify(col(2))
+    categoria = _CATEGORIA_MAP.get(categoria_slug, categoria_slug) if col(2) else None
+    qtdd_raw = col(4)
+    local = col(5)
+    return {
+        "nome": nome,
+        "descricao": col(3) or None,
+        "categoria": categoria,
+        "space_slug": _slugify(local) if local else None,
+        "estado": _ESTADO_MAP.get(_slugify(col(6)), "bom"),
+        "responsavel": col(7) or None,
+        "valor_estimado": _parse_valor(col(8)),
+        "disponibilidade": col(9) or None,
+        "origem": col(10) or None,
+        "quantidade": int(qtdd_raw) if qtdd_raw.isdigit() else None,
+    }
 
 
 @router.post("/sync-sheet")
 async def sync_sheet(db: AsyncSession = Depends(get_db)):
+    """Importa a planilha do acervo de forma incremental.
+
+    GET condicional com o ETag/Last-Modified da última importação; se a
+    planilha não mudou não há escrita nenhuma. Se mudou, só as linhas com hash
+    diferente (ou itens que sumiram do banco) vão para o upsert em lote.
+    Devolve os totais e, em `rows`, o que aconteceu com cada linha.
+    """
     if not ACERVO_CSV_URL:
         raise HTTPException(
             status_code=503,
             detail="GOOGLE_ACERVO_CSV_URL não configurada no ambiente",
         )
 
-    async with httpx.AsyncClient(follow_redirects=True, timeout=15) as client:
-        resp = await client.get(ACERVO_CSV_URL)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=502, detail="Erro ao buscar planilha de acervo")
+    state = await load_state(db, "acervo")
+    sheet = await download(
+        ACERVO_CSV_URL, state.etag, state.last_modified, state.content_hash,
+        erro="Erro ao buscar planilha de acervo",
+    )
+    if not sheet.changed:
+        if validators_changed(state, sheet):
+            save_state(db, state, sheet)
+            await db.commit()
+        return {"created": 0, "updated": 0, "skipped": 0, "unchanged": 0, "not_modified": True, "rows": []}
 
-    reader = csv.reader(io.StringIO(resp.text))
-    rows = list(reader)
-
-    created = updated = skipped = 0
     used_codigos: set[str] = set()
+    parsed: list[tuple[int, str, dict]] = []
+    report: list[dict] = []
+    skipped = 0
 
-    for i, row in enumerate(rows):
-        if i == 0 or not any(c.strip() for c in row):
+    reader = csv.reader(io.StringIO(sheet.text))
+    next(reader, None)  # cabeçalho
+    for linha, row in enumerate(reader, start=2):
+        if not any(c.strip() for c in row):
             continue
-
-        def col(idx: int) -> str:
-            return row[idx].strip() if idx < len(row) else ""
-
-        nome = col(1)
-        if not nome:
+        fields = _parse_acervo_row(row)
+        if fields is None:
+            skipped += 1
+            report.append({"linha": linha, "codigo": None, "acao": "ignorada", "motivo": "sem nome"})
             continue
 
-        categoria_slug = _slugify(col(2))
-        categoria = _CATEGORIA_MAP.get(categoria_slug, categoria_slug) if col(2) else None
-        descricao = col(3) or None
-        qtdd_raw = col(4)
-        local = col(5)
-        estado_slug = _slugify(col(6))
-        estado = _ESTADO_MAP.get(estado_slug, "bom")
-        responsavel = col(7) or None
-        valor_estimado = _parse_valor(col(8))
-        disponibilidade = col(9) or None
-        origem = col(10) or None
-        space_slug = _slugify(local) if local else None
-        quantidade = int(qtdd_raw) if qtdd_raw.isdigit() else None
-
-        base_codigo = f"{categoria or 'outros'}.{_slugify(nome)}"
-        codigo = base_codigo
-        idx = 1
-        while codigo in used_codigos:
-            codigo = f"{base_codigo}_{idx:02d}"
-            idx += 1
+        base_codigo = f"{fields['categoria'] or 'outros'}.{_slugify(fields['nome'])}"
+        codigo = next_free_slug(base_codigo, used_codigos, sep="_", start=1, width=2)
         used_codigos.add(codigo)
+        parsed.append((linha, codigo, fields))
+
+    diff = diff_rows(state, {codigo: fields for _, codigo, fields in parsed})
+    result = await db.execute(select(Item.codigo))
+    existing = set(result.scalars().all())
 
-        result = await db.execute(select(Item).where(Item.codigo == codigo))
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            existing.nome = nome
-            existing.descricao = descricao
-            existing.categoria = categoria
-            existing.space_slug = space_slug
-            existing.estado = estado
-            existing.responsavel = responsavel
-            existing.valor_estimado = valor_estimado
-            existing.disponibilidade = disponibilidade
-            existing.origem = origem
-            existing.quantidade = quantidade
+    created = updated = unchanged = 0
+    upserts: list[dict] = []
+    for linha, codigo, fields in parsed:
+        if codigo not in existing:
+            created += 1
+            acao = "criada"
+        elif codigo in diff.changed:
             updated += 1
+            acao = "atualizada"
         else:
-            db.add(Item(
-                codigo=codigo, nome=nome, descricao=descricao,
-                categoria=categoria, space_slug=space_slug, estado=estado,
-                tipo="comum", responsavel=responsavel,
-                valor_estimado=valor_estimado, disponibilidade=disponibilidade,
-                origem=origem, quantidade=quantidade,
-            ))
-            created += 1
+            unchanged += 1
+            report.append({"linha": linha, "codigo": codigo, "acao": "inalterada"})
+            continue
+        upserts.append({"codigo": codigo, "tipo": "comum", **fields})
+        report.append({"linha": linha, "codigo": codigo, "acao": acao})
+    report.sort(key=lambda r: r["linha"])
 
+    await upsert(db, Item, upserts, key=["codigo"], update=_SHEET_COLUMNS)
+    await reindex(db, [row["codigo"] for row in upserts])
+    save_state(db, state, sheet, diff.hashes)
     await db.commit()
-    return {"created": created, "updated": updated, "skipped": skipped}
+    _invalidate_facets()
+    return {
+        "created": created, "updated": updated, "skipped": skipped,
+        "unchanged": unchanged, "not_modified": False, "rows": report,
+    }
@@ -1,38 +1,204 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+import asyncio
+from collections import Counter
+from datetime import date, datetime, timezone
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, select
+from app.audit_log import audit_log, make_row
+from app.bulk import insert_ignore
 from app.database import get_db
+from app.item_search import fold
+from app.log_archive import archive_horizon, read_archive
+from app.log_rollups import DIMENSOES, apply_rollups, bucket_start
 from app.models.log import Log
-from app.schemas.log import LogCreate, LogResponse
+from app.models.log_rollup import LogRollup
+from app.pagination import as_utc, decode_cursor, encode_cursor
+from app.schemas.log import LogCreate, LogResponse, LogStat
+from app.schemas.sheet_row import SheetRowResponse
+from app.sheet_sync import load_state, row_hash
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
+LOGS_PAGE_SIZE = 100
+
 
 @router.get("", response_model=list[LogResponse])
 async def list_logs(
+    response: Response,
     item_codigo: str | None = Query(None),
     profile_slug: str | None = Query(None),
     acao: str | None = Query(None),
+    desde: datetime | None = Query(None, alias="from"),
+    ate: datetime | None = Query(None, alias="to"),
+    cursor: str | None = Query(None),
+    limit: int = Query(LOGS_PAGE_SIZE, ge=1, le=500),
     db: AsyncSession = Depends(get_db),
 ):
-    query = select(Log).order_by(Log.timestamp.desc())
+    """Logs mais novos primeiro, na janela [from, to).
+
+    Paginação por cursor (timestamp, id): sempre uma página de até `limit`
+    logs; o cursor da próxima vem no header X-Next-Cursor. Logs já arquivados (ver log_archive)
+    entram na mesma ordem, sem o cliente precisar saber onde estão.
+    """
+    query = select(Log).order_by(Log.timestamp.desc(), Log.id.desc())
     if item_codigo:
         query = query.where(Log.item_codigo == item_codigo)
     if profile_slug:
         query = query.where(Log.profile_slug == profile_slug)
     if acao:
         query = query.where(Log.acao == acao)
+    if desde:
+        query = query.where(Log.timestamp >= as_utc(desde))
+    if ate:
+        query = query.where(Log.timestamp < as_utc(ate))
+    antes_de = decode_cursor(cursor) if cursor else None
+    if antes_de:
+        timestamp, log_id = antes_de
+        query = query.where(or_(
+            Log.timestamp < timestamp,
+            and_(Log.timestamp == timestamp, Log.id < log_id),
+        ))
+    query = query.limit(limit + 1)
     result = await db.execute(query)
-    return result.scalars().all()
+    logs = list(result.scalars().all())
+    if not _precisa_do_arquivo(archive_horizon(), as_utc(desde), logs, limit):
+        return _pagina(response, logs, limit)
+
+    arquivados = await asyncio.to_thread(
+        read_archive, item_codigo, profile_slug, acao,
+        as_utc(desde), as_utc(ate), antes_de, limit + 1,
+    )
+    if arquivados:
+        # o mesmo id pode estar nos dois lados se o arquivamento foi interrompido
+        quentes = {log.id for log in logs}
+        logs += [log for log in arquivados if log.id not in quentes]
+        logs.sort(key=lambda log: (as_utc(log.timestamp), log.id), reverse=True)
+    return _pagina(response, logs, limit)
+
+
+def _pagina(response: Response, logs: list[Log], limit: int) -> list[Log]:
+    if len(logs) > limit:
+        logs = logs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(logs[-1].timestamp, logs[-1].id)
+    return logs
+
+
+def _precisa_do_arquivo(horizonte: datetime | None, desde: datetime | None, logs: list[Log], limit: int) -> bool:
+    """Só abre os segmentos se a página pode ter algo deles.
+
+    Nada arquivado é mais novo que o horizonte: se a janela começa depois
+    dele, ou se as linhas quentes já fecham a página (mais a do cursor) antes
+    de chegar lá, o arquivo não muda o resultado.
+    """
+    if horizonte is None:
+        return False
+    if desde and desde > horizonte:
+        return False
+    if len(logs) > limit and as_utc(logs[limit].timestamp) > horizonte:
+        return False
+    return True
+
+
+@router.get("/stats", response_model=list[LogStat])
+async def log_stats(
+    group_by: str | None = Query(None, description="item_codigo,local_uso,acao,profile_slug"),
+    bucket: str = Query("mes", pattern="^(dia|semana|mes|ano|total)$"),
+    item_codigo: str | None = Query(None),
+    local_uso: str | None = Query(None),
+    acao: str | None = Query(None),
+    profile_slug: str | None = Query(None),
+    desde: date | None = Query(None, alias="from"),
+    ate: date | None = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Totais de Logs por período e dimensões, lidos de log_rollups.
+
+    Ex.: uso da Casa de Apoio 1 por mês (`local_uso=casa-de-apoio-1`), ou as
+    ferramentas que mais circulam (`group_by=item_codigo&acao=retirou&bucket=total`).
+    A janela [from, to) é em dias.
+    """
+    grupos = [g.strip() for g in group_by.split(",") if g.strip()] if group_by else []
+    if any(g not in DIMENSOES for g in grupos):
+        raise HTTPException(status_code=400, detail=f"group_by aceita: {', '.join(DIMENSOES)}")
+    por_periodo = bucket != "total"
+    colunas = [getattr(LogRollup, g) for g in grupos]
+    if por_periodo:
+        colunas.insert(0, LogRollup.dia)
+    query = select(*colunas, func.sum(LogRollup.total)).group_by(*colunas)
+    filtros = {"item_codigo": item_codigo, "local_uso": local_uso, "acao": acao, "profile_slug": profile_slug}
+    for campo, valor in filtros.items():
+        if valor:
+            query = query.where(getattr(LogRollup, campo) == valor)
+    if desde:
+        query = query.where(LogRollup.dia >= desde)
+    if ate:
+        query = query.where(LogRollup.dia < ate)
+    result = await db.execute(query)
+
+    # dia -> semana/mês/ano aqui, igual nos dois bancos
+    totais: dict[tuple, int] = {}
+    for *chave, total in result.all():
+        if total is None:
+            continue  # sem group_by o SUM devolve uma linha NULL quando nada casa
+        if por_periodo:
+            chave[0] = bucket_start(chave[0], bucket)
+        totais[tuple(chave)] = totais.get(tuple(chave), 0) + total
+    stats = []
+    for chave, total in totais.items():
+        periodo, dims = (chave[0], chave[1:]) if por_periodo else (None, chave)
+        stats.append(LogStat(periodo=periodo, total=total, **{g: v or None for g, v in zip(grupos, dims)}))
+    stats.sort(key=lambda s: (s.periodo or date.min, -s.total))
+    return stats
 
 
 @router.post("", response_model=LogResponse, status_code=201)
 async def create_log(data: LogCreate, db: AsyncSession = Depends(get_db)):
-    log = Log(**data.model_dump())
-    db.add(log)
-    await db.commit()
-    await db.refresh(log)
-    return log
+    return await audit_log.record(**data.model_dump())
+
+
+# Categoria da planilha de finanças (sem acento, minúsculas) -> ação do Log
+_CATEGORIA_ACAO = {
+    "compra": "compra_realizada",
+    "doac": "doacao_recebida",
+    "invest": "investimento_planejado",
+    "caixinha": "reposicao_caixinha",
+}
+
+
+def _acao(categoria: str | None) -> str | None:
+    texto = fold(categoria)
+    for prefixo, acao in _CATEGORIA_ACAO.items():
+        if texto.startswith(prefixo):
+            return acao
+    return None
+
+
+def _data(value: str | None) -> datetime | None:
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d") if value else None
+    except ValueError:
+        return None
+
+
+def _log_row(row: SheetRowResponse, acao: str, ocorrencia: int) -> dict:
+    """Linha de `logs` para um lançamento da planilha.
+
+    source_key é derivado do conteúdo; `ocorrencia` separa lançamentos
+    idênticos (mesmo dia, descrição e valor) que aparecem mais de uma vez.
+    """
+    campos = row.model_dump(exclude={"id"})
+    parts = []
+    if row.descricao:
+        parts.append(row.descricao)
+    if row.valor is not None:
+        parts.append(f"R${row.valor:.2f}")
+    return make_row(
+        acao=acao,
+        timestamp=_data(row.data),
+        descricao_incidente=" — ".join(parts) if parts else None,
+        fotos_evidencia=[row.comprovante] if row.comprovante else None,
+        source_key=f"financas:{row_hash([campos, ocorrencia])}",
+    )
 
 
 @router.post("/sync-sheet")
@@ -45,59 +211,28 @@ async def sync_logs_from_sheet(db: AsyncSession = Depends(get_db)):
     except HTTPException:
         return {"created": 0, "skipped": 0, "error": "planilha_nao_configurada"}
 
-    # Map sheet status to log actions
-    status_to_acao = {
-        "Compras": "compra_realizada",
-        "Doação": "doacao_recebida",
-        "Investir": "investimento_planejado",
-        "Caixinha": "reposicao_caixinha",
-    }
-
-    # Get existing item_codigos to avoid duplicates
-    result = await db.execute(
-        select(Log.item_codigo).where(Log.item_codigo.isnot(None))
-    )
-    existing_codes = {r for r in result.scalars().all() if r}
-
-    created = 0
-    skipped = 0
+    state = await load_state(db, "logs")
+    digest = row_hash([r.model_dump(exclude={"id"}) for r in rows])
+    if digest == state.content_hash:
+        return {"created": 0, "skipped": 0, "not_modified": True}
 
+    # Lançamentos já importados esbarram no índice único de source_key
+    ocorrencias: Counter[str] = Counter()
+    novos = []
     for row in rows:
-        acao = status_to_acao.get(row.status)
+        acao = _acao(row.categoria)
         if not acao:
             continue
+        chave = row_hash(row.model_dump(exclude={"id"}))
+        novos.append(_log_row(row, acao, ocorrencias[chave]))
+        ocorrencias[chave] += 1
 
-        # Generate item_codigo
-        area = (row.area or "").lower().strip()
-        item = (row.item or "").lower().strip().replace(" ", "_")
-        item_codigo = f"{area}.{item}" if area and item else None
-
-        if item_codigo and item_codigo in existing_codes:
-            skipped += 1
-            continue
-
-        # Build description with quantity and value
-        parts = []
-        if row.quantidade is not None:
-            parts.append(f"{row.quantidade}x")
-        if row.descricao:
-            parts.append(row.descricao)
-        if row.valor is not None:
-            parts.append(f"R${row.valor:.2f}")
-
-        descricao = " — ".join(parts) if parts else None
-
-        log = Log(
-            item_codigo=item_codigo,
-            acao=acao,
-            profile_slug=row.responsavel,
-            local_uso=row.area or None,
-            descricao_incidente=descricao,
-        )
-        db.add(log)
-        created += 1
-        if item_codigo:
-            existing_codes.add(item_codigo)
+    inseridos = {k for (k,) in await insert_ignore(db, Log, novos, key=["source_key"])}
+    await apply_rollups(db, [r for r in novos if r["source_key"] in inseridos])
+    created = len(inseridos)
 
+    state.content_hash = digest
+    state.synced_at = datetime.now(timezone.utc)
+    db.add(state)
     await db.commit()
-    return {"created": created, "skipped": skipped}
+    return {"created": created, "skipped": len(novos) - created, "not_modified": False}
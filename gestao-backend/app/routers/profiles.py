@@ -4,7 +4,9 @@ from sqlalchemy import select
 from app.database import get_db
 from app.models.profile import Profile
 from app.schemas.profile import ProfileCreate, ProfileUpdate, ProfileResponse
-from app.routers.auth import get_current_user
+from app.principal import Principal, profile_epochs
+from app.routers.auth import get_principal
+from app.token_cache import token_cache
 
 router = APIRouter(prefix="/api/profiles", tags=["profiles"])
 
@@ -38,7 +40,7 @@ async def update_profile(
     slug: str,
     data: ProfileUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: Profile = Depends(get_current_user),
+    current_user: Principal = Depends(get_principal),
 ):
     result = await db.execute(select(Profile).where(Profile.slug == slug))
     profile = result.scalar_one_or_none()
@@ -50,10 +52,18 @@ async def update_profile(
     if not current_user.is_admin:
         update_data.pop("is_admin", None)
         update_data.pop("ativo", None)
+    revoke = any(
+        key in update_data and update_data[key] != getattr(profile, key)
+        for key in ("ativo", "is_admin")
+    )
     for key, value in update_data.items():
         setattr(profile, key, value)
+    if revoke:
+        profile.token_version = (profile.token_version or 0) + 1
     await db.commit()
     await db.refresh(profile)
+    token_cache.invalidate_slug(slug)
+    profile_epochs.forget(slug)
     return profile
 
 
@@ -61,7 +71,7 @@ async def update_profile(
 async def delete_profile(
     slug: str,
     db: AsyncSession = Depends(get_db),
-    current_user: Profile = Depends(get_current_user),
+    current_user: Principal = Depends(get_principal),
 ):
     result = await db.execute(select(Profile).where(Profile.slug == slug))
     profile = result.scalar_one_or_none()
@@ -71,3 +81,5 @@ async def delete_profile(
         raise HTTPException(status_code=403, detail="Apenas o próprio usuário ou um administrador pode excluir este perfil.")
     await db.delete(profile)
     await db.commit()
+    token_cache.invalidate_slug(slug)
+    profile_epochs.forget(slug)
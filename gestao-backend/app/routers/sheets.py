@@ -4,15 +4,17 @@ import os
 import time
 import uuid
 from datetime import datetime, timezone
-import httpx
 from fastapi import APIRouter, HTTPException
+from app.sheet_sync import download
 from app.schemas.sheet_row import SheetDataResponse, SheetRowResponse
 
 router = APIRouter(prefix="/api/sheets", tags=["sheets"])
 
 SHEET_CSV_URL = os.getenv("GOOGLE_SHEET_CSV_URL", "")
 
-_cache: dict = {"data": None, "ts": 0.0}
+# Os validadores ficam junto das linhas em memória: sem as linhas um 304 não
+# serve para nada, então depois de reiniciar o primeiro GET é incondicional.
+_cache: dict = {"data": None, "ts": 0.0, "etag": None, "last_modified": None, "hash": None}
 CACHE_TTL = 300  # 5 minutos
 
 
@@ -49,14 +51,15 @@ async def _fetch_rows() -> list[SheetRowResponse]:
     if _cache["data"] is not None and now - _cache["ts"] < CACHE_TTL:
         return _cache["data"]
 
-    async with httpx.AsyncClient(follow_redirects=True, timeout=15) as client:
-        resp = await client.get(SHEET_CSV_URL)
-        if resp.status_code != 200:
-            raise HTTPException(
-                status_code=502, detail="Erro ao buscar planilha Google Sheets"
-            )
+    if _cache["data"] is not None:
+        sheet = await download(SHEET_CSV_URL, _cache["etag"], _cache["last_modified"], _cache["hash"])
+    else:
+        sheet = await download(SHEET_CSV_URL)
+    _cache.update(ts=now, etag=sheet.etag, last_modified=sheet.last_modified, hash=sheet.content_hash)
+    if not sheet.changed:
+        return _cache["data"]
 
-    reader = csv.reader(io.StringIO(resp.text))
+    reader = csv.reader(io.StringIO(sheet.text))
     rows_out: list[SheetRowResponse] = []
 
     for i, row in enumerate(reader):
@@ -82,7 +85,6 @@ async def _fetch_rows() -> list[SheetRowResponse]:
         )
 
     _cache["data"] = rows_out
-    _cache["ts"] = now
     return rows_out
 
 
@@ -1,11 +1,11 @@
 from app.schemas.profile import ProfileCreate, ProfileUpdate, ProfileResponse
 from app.schemas.space import SpaceCreate, SpaceUpdate, SpaceResponse
-from app.schemas.item import ItemCreate, ItemUpdate, ItemResponse
+from app.schemas.item import ItemCreate, ItemUpdate, ItemResponse, ItemFacets
 from app.schemas.booking import BookingCreate, BookingUpdate, BookingResponse
-from app.schemas.log import LogCreate, LogResponse
+from app.schemas.log import LogCreate, LogResponse, LogStat
 from app.schemas.wiki_article import WikiArticleCreate, WikiArticleUpdate, WikiArticleResponse
 from app.schemas.alert import AlertCreate, AlertUpdate, AlertResponse
 from app.schemas.chamado import ChamadoCreate, ChamadoUpdate, ChamadoResponse
 from app.schemas.prestador import PrestadorCreate, PrestadorResponse
-from app.schemas.enquete import EnqueteCreate, EnqueteUpdate, VotoCreate, EnqueteResponse
+from app.schemas.enquete import EnqueteCreate, EnqueteUpdate, VotoCreate, EnqueteResponse, EnqueteSummary
 from app.schemas.sheet_row import SheetRowResponse, SheetDataResponse
@@ -14,6 +14,7 @@ class AlertCreate(BaseModel):
 
 class AlertUpdate(BaseModel):
     lido: bool | None = None
+    oculto: bool | None = None  # esconde só para quem está logado
     titulo: str | None = None
     mensagem: str | None = None
 
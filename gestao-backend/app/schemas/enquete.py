@@ -46,6 +46,7 @@ class EnqueteResponse(BaseModel):
     votos: dict[str, Any]
     votantes: dict[str, Any]
     total_votos: int
+    votantes_count: int = 0
     criador: str | None = None
     multipla_escolha: bool
     anonima: bool = False
@@ -66,6 +67,34 @@ class EnqueteResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class EnqueteSummary(BaseModel):
+    """Projeção leve de EnqueteResponse, sem votantes/respostas por bolinha."""
+
+    id: str
+    titulo: str
+    categoria: str
+    tipo: str = "multipla"
+    opcoes: list[str]
+    votos: dict[str, Any]
+    total_votos: int
+    votantes_count: int
+    criador: str | None = None
+    multipla_escolha: bool
+    anonima: bool = False
+    status: str
+    quorum_required: int = 60
+    approval_threshold: int = 66
+    closes_at: datetime | None = None
+    voting_starts_at: datetime | None = None
+    created_at: datetime
+    quorum_percent: int | None = None
+    quorum_met: bool | None = None
+    approval_percent: int | None = None
+    approved: bool | None = None
+
+    model_config = {"from_attributes": True}
+
+
 class ComentarioCreate(BaseModel):
     autor: str
     conteudo: str
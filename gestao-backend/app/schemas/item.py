@@ -74,3 +74,17 @@ class ItemResponse(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class FacetCount(BaseModel):
+    valor: str | None
+    total: int
+
+
+class ItemFacets(BaseModel):
+    total: int
+    categoria: list[FacetCount]
+    estado: list[FacetCount]
+    space_slug: list[FacetCount]
+    tipo: list[FacetCount]
+    disponibilidade: list[FacetCount]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 
 
 class LogCreate(BaseModel):
@@ -32,3 +32,14 @@ class LogResponse(BaseModel):
     sazonalidade: str | None = None
 
     model_config = {"from_attributes": True}
+
+
+class LogStat(BaseModel):
+    """Uma linha de /api/logs/stats; dimensões fora do group_by vêm nulas."""
+
+    periodo: date | None = None
+    item_codigo: str | None = None
+    local_uso: str | None = None
+    acao: str | None = None
+    profile_slug: str | None = None
+    total: int
@@ -0,0 +1,107 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.http_clients import http_clients
+from app.models.sync_state import SyncState
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def row_hash(fields) -> str:
+    raw = json.dumps(fields, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+@dataclass
+class SheetDownload:
+    """Resultado de um GET condicional. `text` é None quando nada mudou
+    (304 ou mesmo hash do último conteúdo importado)."""
+
+    text: str | None
+    etag: str | None
+    last_modified: str | None
+    content_hash: str | None
+
+    @property
+    def changed(self) -> bool:
+        return self.text is not None
+
+
+async def download(
+    url: str,
+    etag: str | None = None,
+    last_modified: str | None = None,
+    previous_hash: str | None = None,
+    erro: str = "Erro ao buscar planilha Google Sheets",
+) -> SheetDownload:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    resp = await http_clients.get("google").get(url, headers=headers)
+    if resp.status_code == 304:
+        return SheetDownload(None, etag, last_modified, previous_hash)
+    if resp.status_code != 200:
+        raise HTTPException(status_code=502, detail=erro)
+    digest = content_hash(resp.content)
+    return SheetDownload(
+        None if digest == previous_hash else resp.text,
+        resp.headers.get("etag"),
+        resp.headers.get("last-modified"),
+        digest,
+    )
+
+
+async def load_state(db: AsyncSession, fonte: str) -> SyncState:
+    state = await db.get(SyncState, fonte)
+    return state or SyncState(fonte=fonte, row_hashes={})
+
+
+@dataclass
+class RowDiff:
+    """Linhas cujo hash mudou desde a última importação."""
+
+    changed: set[str] = field(default_factory=set)
+    hashes: dict[str, str] = field(default_factory=dict)
+
+
+def diff_rows(state: SyncState, rows: dict[str, object]) -> RowDiff:
+    previous = state.row_hashes or {}
+    diff = RowDiff()
+    for key, fields in rows.items():
+        h = row_hash(fields)
+        diff.hashes[key] = h
+        if previous.get(key) != h:
+            diff.changed.add(key)
+    return diff
+
+
+def validators_changed(state: SyncState, sheet: SheetDownload) -> bool:
+    """Conteúdo igual com ETag/Last-Modified novos: vale gravar para que a
+    próxima sincronização já receba 304."""
+    return (sheet.etag, sheet.last_modified) != (state.etag, state.last_modified)
+
+
+def save_state(
+    db: AsyncSession,
+    state: SyncState,
+    sheet: SheetDownload,
+    row_hashes: dict[str, str] | None = None,
+) -> None:
+    """Grava os validadores; quem chama faz o commit junto com os dados, para
+    que uma importação que falhou seja refeita na próxima vez."""
+    state.etag = sheet.etag
+    state.last_modified = sheet.last_modified
+    state.content_hash = sheet.content_hash
+    if row_hashes is not None:
+        state.row_hashes = row_hashes
+    state.synced_at = datetime.now(timezone.utc)
+    db.add(state)
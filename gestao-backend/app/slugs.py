@@ -0,0 +1,66 @@
+import re
+from collections.abc import Callable, Iterable
+from typing import TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+T = TypeVar("T")
+
+
+def profile_base_slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9-]+", "", text.lower().strip().replace(" ", "-")) or "perfil"
+
+
+def next_free_slug(
+    base: str, taken: Iterable[str], sep: str = "-", start: int = 2, width: int = 0
+) -> str:
+    """Primeiro de base, base-2, base-3... que não está em `taken`."""
+    taken = set(taken)
+    if base not in taken:
+        return base
+    n = start
+    while f"{base}{sep}{n:0{width}d}" in taken:
+        n += 1
+    return f"{base}{sep}{n:0{width}d}"
+
+
+async def allocate_slug(
+    db: AsyncSession, column: InstrumentedAttribute, base: str, **kwargs
+) -> str:
+    """Escolhe um slug livre buscando todos os `base%` existentes numa só query."""
+    pattern = base.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    result = await db.execute(select(column).where(column.like(f"{pattern}%", escape="\\")))
+    return next_free_slug(base, result.scalars().all(), **kwargs)
+
+
+async def add_with_unique_slug(
+    db: AsyncSession,
+    column: InstrumentedAttribute,
+    base: str,
+    build: Callable[[str], T],
+    attempts: int = 5,
+) -> T:
+    """Insere build(slug) e faz commit, contando com a constraint UNIQUE.
+
+    Se outro request pegar o mesmo slug entre a escolha e o commit, o
+    IntegrityError faz escolher de novo. Conflitos em outras colunas
+    (o slug continua livre) são repassados.
+    """
+    last_slug = None
+    last_error: IntegrityError | None = None
+    for _ in range(attempts):
+        slug = await allocate_slug(db, column, base)
+        if slug == last_slug:
+            break  # o conflito não foi no slug
+        obj = build(slug)
+        db.add(obj)
+        try:
+            await db.commit()
+            return obj
+        except IntegrityError as e:
+            await db.rollback()
+            last_slug, last_error = slug, e
+    raise last_error
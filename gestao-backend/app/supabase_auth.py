@@ -0,0 +1,142 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import httpx
+from jose import JWTError, jwt
+
+from app.http_clients import http_clients
+from app.token_cache import TokenCache
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "")
+SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "")
+
+# "remote": valida cada token em /auth/v1/user (comportamento original)
+# "local": valida assinatura/exp/aud/iss localmente e só consulta o Supabase
+#          a cada SUPABASE_REVALIDATE_SECONDS para detectar revogação
+SUPABASE_VERIFY_MODE = os.getenv("SUPABASE_VERIFY_MODE", "remote")
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "")
+SUPABASE_JWKS_FILE = os.getenv("SUPABASE_JWKS_FILE", "")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_REVALIDATE_SECONDS = int(os.getenv("SUPABASE_REVALIDATE_SECONDS", "900"))
+
+_HMAC_ALGORITHMS = {"HS256"}
+_JWKS_ALGORITHMS = {"RS256", "ES256"}
+_REVALIDATION_MAX_ENTRIES = 4096
+
+# digest do token -> momento da última confirmação no Supabase
+_revalidated_at: OrderedDict[str, float] = OrderedDict()
+
+
+def enabled() -> bool:
+    if not SUPABASE_URL:
+        return False
+    return bool(SUPABASE_ANON_KEY) or SUPABASE_VERIFY_MODE == "local"
+
+
+def issuer() -> str:
+    return f"{SUPABASE_URL.rstrip('/')}/auth/v1"
+
+
+@lru_cache(maxsize=1)
+def _jwks() -> dict[str, dict]:
+    if not SUPABASE_JWKS_FILE:
+        return {}
+    with open(SUPABASE_JWKS_FILE) as f:
+        data = json.load(f)
+    return {k["kid"]: k for k in data.get("keys", []) if k.get("kid")}
+
+
+def verify_locally(token: str) -> dict | None:
+    """Valida o token com o segredo do projeto ou o JWKS local.
+
+    Retorna os claims, None se não houver chave local para este token, ou
+    levanta JWTError se a assinatura, `exp`, `aud` ou `iss` forem inválidos.
+    """
+    header = jwt.get_unverified_header(token)
+    alg = header.get("alg")
+    if alg in _HMAC_ALGORITHMS:
+        if not SUPABASE_JWT_SECRET:
+            return None
+        key = SUPABASE_JWT_SECRET
+    elif alg in _JWKS_ALGORITHMS:
+        key = _jwks().get(header.get("kid"))
+        if key is None:
+            return None
+    else:
+        raise JWTError(f"Algoritmo não suportado: {alg}")
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[alg],
+        audience=SUPABASE_JWT_AUDIENCE,
+        issuer=issuer(),
+    )
+
+
+async def fetch_user(token: str) -> dict | None:
+    """Consulta /auth/v1/user. None se o Supabase recusar o token."""
+    res = await http_clients.get("supabase").get(
+        f"{SUPABASE_URL}/auth/v1/user",
+        headers={
+            "Authorization": f"Bearer {token}",
+            "apikey": SUPABASE_ANON_KEY,
+        },
+    )
+    if res.status_code != 200:
+        return None
+    return res.json()
+
+
+def _revalidation_due(token: str, claims: dict) -> bool:
+    """Token novo com assinatura válida é aceito sem ida ao Supabase: conta
+    como conferido no `iat` (ou agora) e só revalida depois do intervalo."""
+    if not SUPABASE_ANON_KEY:
+        return False
+    checked_at = _revalidated_at.get(TokenCache.digest(token))
+    if checked_at is None:
+        iat = claims.get("iat")
+        checked_at = min(float(iat), time.time()) if iat is not None else time.time()
+        _mark_revalidated(token, checked_at)
+    return time.time() - checked_at >= SUPABASE_REVALIDATE_SECONDS
+
+
+def _mark_revalidated(token: str, checked_at: float | None = None) -> None:
+    key = TokenCache.digest(token)
+    _revalidated_at.pop(key, None)
+    _revalidated_at[key] = time.time() if checked_at is None else checked_at
+    while len(_revalidated_at) > _REVALIDATION_MAX_ENTRIES:
+        _revalidated_at.popitem(last=False)
+
+
+async def get_user(token: str) -> dict | None:
+    """Dados do usuário Supabase dono do token, ou None se o token não for válido."""
+    if SUPABASE_VERIFY_MODE != "local":
+        return await fetch_user(token)
+
+    try:
+        claims = verify_locally(token)
+    except JWTError:
+        return None
+    if claims is None:
+        return await fetch_user(token) if SUPABASE_ANON_KEY else None
+
+    if _revalidation_due(token, claims):
+        try:
+            remote = await fetch_user(token)
+        except httpx.HTTPError:
+            # Supabase fora do ar: a assinatura já foi conferida, tentar de novo depois
+            remote = claims
+        else:
+            if remote is None:
+                return None  # sessão revogada
+            _mark_revalidated(token)
+        return remote
+
+    return {
+        "id": claims.get("sub"),
+        "email": claims.get("email"),
+        "user_metadata": claims.get("user_metadata") or {},
+    }
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.principal import Principal
+
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "1024"))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))  # segundos
+
+
+@dataclass
+class _Entry:
+    principal: Principal
+    expires_at: float
+
+
+class TokenCache:
+    """Cache LRU com TTL: digest do token já verificado -> Principal.
+
+    O token em si nunca é guardado, só o sha256. Cada entrada expira no menor
+    valor entre o TTL do cache e o `exp` do próprio token.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._by_slug: dict[str, set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Principal | None:
+        key = self.digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.time():
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.principal
+
+    def put(self, token: str, principal: Principal, exp: float | None = None) -> None:
+        now = time.time()
+        expires_at = now + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+        key = self.digest(token)
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = _Entry(principal=principal, expires_at=expires_at)
+        self._by_slug.setdefault(principal.slug, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def invalidate_slug(self, slug: str) -> None:
+        """Remove todos os tokens de um perfil (atualizado, desativado ou excluído)."""
+        for key in list(self._by_slug.get(slug, ())):
+            self._drop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_slug.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_slug.get(entry.principal.slug)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_slug[entry.principal.slug]
+
+
+token_cache = TokenCache(TOKEN_CACHE_MAX_ENTRIES, TOKEN_CACHE_TTL)
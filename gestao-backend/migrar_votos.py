@@ -0,0 +1,31 @@
+"""
+Copia votos e respostas das colunas JSON enquetes.votantes/respostas para as
+tabelas enquete_votos e enquete_respostas.
+
+O lifespan já faz isso uma vez (app.apuracao.migrar_votos_legado); este script
+força a cópia de novo, sem subir o servidor. Pode ser repetido sem duplicar
+nada (o que já foi copiado é ignorado).
+
+Uso (execute do diretório gestao-backend, com DATABASE_URL do ambiente):
+    python migrar_votos.py
+"""
+
+import asyncio
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.apuracao import migrar_votos_legado
+from app.database import engine, init_db
+
+
+async def main():
+    await init_db()
+    async with engine.begin() as conn:
+        votos = await migrar_votos_legado(conn, forcar=True)
+    print(f"Pronto: {votos} votos copiados.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+import asyncio
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("AUDIT_LOG_MODE", "sync")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.models  # noqa: F401  (registra as tabelas no Base)
+from app.audit_log import audit_log
+from app.database import Base, get_db
+from app.main import app
+from app.principal import Principal
+from app.routers.auth import get_principal
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Banco SQLite próprio do teste, com as tabelas criadas."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool)
+
+    async def criar():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(criar())
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    """TestClient sem lifespan, com get_db no banco do teste e um admin logado."""
+    monkeypatch.setattr(audit_log, "session_factory", session_factory)
+
+    async def _get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_principal] = lambda: Principal(slug="admin", is_admin=True)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
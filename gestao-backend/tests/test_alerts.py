@@ -0,0 +1,53 @@
+import uuid
+
+from app.main import app
+from app.principal import Principal
+from app.routers.auth import get_principal
+
+
+def _logar(slug: str) -> None:
+    app.dependency_overrides[get_principal] = lambda: Principal(slug=slug)
+
+
+def test_chamado_gera_um_alerta_geral_com_leitura_por_perfil(client):
+    r = client.post("/api/chamados", json={"estrutura": "Caixa d'água", "descricao": "vazando"})
+    assert r.status_code == 201
+
+    alertas = client.get("/api/alerts?lido=false").json()
+    assert len(alertas) == 1
+    assert alertas[0]["profile_slug"] is None
+    uuid.UUID(alertas[0]["id"])
+
+    _logar("ana")
+    assert client.put(f"/api/alerts/{alertas[0]['id']}", json={"lido": True}).json()["lido"] is True
+    assert client.get("/api/alerts?lido=false").json() == []
+    assert client.get("/api/alerts?lido=false&profile_slug=ana").json() == []
+
+    _logar("bia")
+    pendentes = client.get("/api/alerts?lido=false&profile_slug=bia").json()
+    assert [a["id"] for a in pendentes] == [alertas[0]["id"]]
+
+
+def test_alerta_de_um_perfil_continua_usando_a_coluna_lido(client):
+    criado = client.post("/api/alerts", json={"titulo": "Sua reserva", "profile_slug": "ana"}).json()
+    _logar("ana")
+    client.put(f"/api/alerts/{criado['id']}", json={"lido": True})
+    assert client.get("/api/alerts?profile_slug=ana&lido=true").json()[0]["id"] == criado["id"]
+
+
+def test_alerta_geral_so_admin_remove_ou_edita_e_cada_perfil_oculta_o_seu(client):
+    client.post("/api/chamados", json={"estrutura": "Portão", "descricao": "emperrado"})
+    alerta = client.get("/api/alerts").json()[0]
+
+    _logar("ana")
+    assert client.delete(f"/api/alerts/{alerta['id']}").status_code == 403
+    assert client.put(f"/api/alerts/{alerta['id']}", json={"titulo": "outro"}).status_code == 403
+    assert client.put(f"/api/alerts/{alerta['id']}", json={"oculto": True}).status_code == 200
+    assert client.get("/api/alerts?profile_slug=ana").json() == []
+
+    _logar("bia")
+    visiveis = client.get("/api/alerts?profile_slug=bia").json()
+    assert [(a["id"], a["titulo"], a["lido"]) for a in visiveis] == [(alerta["id"], alerta["titulo"], False)]
+
+    app.dependency_overrides[get_principal] = lambda: Principal(slug="admin", is_admin=True)
+    assert client.delete(f"/api/alerts/{alerta['id']}").status_code == 204
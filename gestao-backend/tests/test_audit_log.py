@@ -0,0 +1,42 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import audit_log as modulo
+from app.audit_log import AuditLogWriter
+from app.models.log import Log
+
+
+def test_linha_ruim_nao_trava_a_fila(session_factory, monkeypatch):
+    monkeypatch.setattr(modulo, "AUDIT_LOG_MAX_RETRIES", 3)
+    writer = AuditLogWriter(mode="sync", session_factory=session_factory)
+
+    async def cenario():
+        await writer.record(item_codigo="X-1")  # sem acao: NOT NULL falha
+        await writer.record(acao="retirou", item_codigo="X-2")
+        assert writer.stats()["pending"] == 2
+        await writer.record(acao="devolveu", item_codigo="X-2")
+
+        async with session_factory() as db:
+            result = await db.execute(select(Log.acao).order_by(Log.timestamp))
+            return result.scalars().all()
+
+    assert asyncio.run(cenario()) == ["retirou", "devolveu"]
+    stats = writer.stats()
+    assert (stats["pending"], stats["dead_letter"], stats["written"]) == (0, 1, 2)
+
+
+def test_banco_fora_do_ar_guarda_as_linhas(tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo, "AUDIT_LOG_MAX_RETRIES", 1)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'nao-existe' / 'x.db'}", poolclass=NullPool)
+    writer = AuditLogWriter(mode="sync", session_factory=async_sessionmaker(engine, class_=AsyncSession))
+
+    async def cenario():
+        await writer.record(acao="retirou", item_codigo="X-1")
+        await writer.record(acao="devolveu", item_codigo="X-1")
+
+    asyncio.run(cenario())
+    stats = writer.stats()
+    assert (stats["pending"], stats["dead_letter"]) == (2, 0)
@@ -0,0 +1,62 @@
+import asyncio
+
+from app.enquete_stream import EnqueteBroker
+from app.models.profile import Profile
+from app.routers.auth import get_stream_principal
+
+
+def _criar_enquete(client) -> str:
+    r = client.post("/api/enquetes", json={"titulo": "Pintura do galpão", "opcoes": ["Azul", "Verde"]})
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+def _criar_perfil(session_factory, slug: str) -> None:
+    async def criar():
+        async with session_factory() as db:
+            db.add(Profile(slug=slug, nome_completo=slug.title()))
+            await db.commit()
+
+    asyncio.run(criar())
+
+
+def test_stream_exige_token_da_propria_enquete(client, session_factory):
+    _criar_perfil(session_factory, "admin")
+    enquete_id = _criar_enquete(client)
+    outra_id = _criar_enquete(client)
+
+    assert client.get(f"/api/enquetes/{enquete_id}/stream").status_code == 401
+
+    token = client.post(f"/api/enquetes/{outra_id}/stream-token").json()["token"]
+    assert client.get(f"/api/enquetes/{enquete_id}/stream?token={token}").status_code == 401
+
+    token = client.post(f"/api/enquetes/{enquete_id}/stream-token").json()["token"]
+
+    async def autenticar():
+        async with session_factory() as db:
+            return await get_stream_principal(enquete_id, token, db)
+
+    assert asyncio.run(autenticar()).slug == "admin"
+
+
+class _Request:
+    async def is_disconnected(self) -> bool:
+        return True
+
+
+def test_inscricao_so_existe_enquanto_o_corpo_roda():
+    async def cenario():
+        broker = EnqueteBroker(max_connections=1)
+        corpo = broker.events("e1", _Request(), {"id": "e1"})
+        # cliente caiu antes de o corpo começar: nada inscrito
+        assert broker.stats()["connections"] == 0
+        await corpo.aclose()
+        assert broker.stats()["connections"] == 0
+
+        corpo = broker.events("e1", _Request(), {"id": "e1"})
+        assert (await corpo.__anext__()).startswith("event: apuracao")
+        assert broker.stats()["connections"] == 1
+        await corpo.aclose()
+        assert broker.stats()["connections"] == 0
+
+    asyncio.run(cenario())
@@ -0,0 +1,14 @@
+from app.routers import items
+
+
+def test_cache_de_facetas_e_limitado(client, monkeypatch):
+    monkeypatch.setattr(items, "FACETS_CACHE_MAX_ENTRIES", 2)
+    items._invalidate_facets()
+    for categoria in ("cozinha", "lazer", "jardim"):
+        assert client.get(f"/api/items/facets?categoria={categoria}").status_code == 200
+    assert [k[0] for k in items._facets_cache] == ["lazer", "jardim"]
+
+    # acesso recente sobe na fila: "lazer" sobrevive à próxima inserção
+    client.get("/api/items/facets?categoria=lazer")
+    client.get("/api/items/facets?categoria=cozinha")
+    assert [k[0] for k in items._facets_cache] == ["lazer", "cozinha"]
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from app import item_search
+
+
+@pytest.fixture(autouse=True)
+def indice_fora(monkeypatch):
+    """Cada teste começa sem índice; o estado é do módulo, não do banco."""
+    monkeypatch.setitem(item_search._stats, "available", False)
+
+
+def _criar_item(client, codigo: str, nome: str) -> None:
+    r = client.post("/api/items", json={"codigo": codigo, "nome": nome, "tags": ["obra"]})
+    assert r.status_code == 201
+
+
+def test_sem_indice_reindex_e_pulado_e_busca_usa_like(client):
+    _criar_item(client, "FER-001", "Furadeira Elétrica")
+
+    r = client.get("/api/items/search?q=furad")
+    assert [i["codigo"] for i in r.json()] == ["FER-001"]
+    # tags também entram, como no índice
+    assert [i["codigo"] for i in client.get("/api/items/search?q=obra").json()] == ["FER-001"]
+    assert item_search.stats()["fallback_searches"] >= 1
+
+
+def _iniciar(session_factory) -> None:
+    async def iniciar():
+        async with session_factory() as db:
+            conn = await db.connection()
+            await item_search.init_search(conn)
+            await db.commit()
+
+    asyncio.run(iniciar())
+
+
+def test_init_search_reconstroi_indice_desatualizado(client, session_factory):
+    _iniciar(session_factory)
+    _criar_item(client, "FER-002", "Serra Circular")
+
+    # índice fora do ar: item alterado sem mudar a contagem de linhas
+    item_search._stats["available"] = False
+    assert client.put("/api/items/FER-002", json={"nome": "Lixadeira Orbital"}).status_code == 200
+
+    _iniciar(session_factory)
+    assert item_search.stats()["available"] is True
+    assert client.get("/api/items/search?q=serra").json() == []
+    assert [i["codigo"] for i in client.get("/api/items/search?q=lixadeira").json()] == ["FER-002"]
+
+    _criar_item(client, "FER-003", "Furadeira Elétrica")
+    assert [i["codigo"] for i in client.get("/api/items/search?q=eletrica").json()] == ["FER-003"]
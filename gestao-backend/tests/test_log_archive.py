@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import log_archive
+from app.models.log import Log
+from app.pagination import utcnow
+from app.routers import logs as logs_router
+
+ANTIGOS = [datetime(2025, 1, 5, 10), datetime(2025, 1, 20, 9), datetime(2025, 2, 3, 8),
+           datetime(2025, 2, 3, 8), datetime(2025, 2, 28, 23)]
+
+
+@pytest.fixture
+def arquivo(tmp_path, monkeypatch, session_factory):
+    """5 Logs arquivados (jan e fev/2025) e 2 ainda na tabela."""
+    monkeypatch.setattr(log_archive, "LOG_ARCHIVE_DIR", tmp_path / "arquivo")
+    agora = utcnow()
+
+    async def preparar():
+        async with session_factory() as db:
+            for i, ts in enumerate(ANTIGOS):
+                db.add(Log(id=f"old-{i}", acao="retirou", item_codigo="FER-001", timestamp=ts))
+            for i in range(2):
+                db.add(Log(id=f"new-{i}", acao="retirou", item_codigo="FER-001", timestamp=agora - timedelta(hours=i)))
+            await db.commit()
+            assert await log_archive.archive_older_than(db, datetime(2025, 6, 1)) == 5
+        # rodada interrompida depois do disco e antes do DELETE: o lote de
+        # janeiro é arquivado de novo e os mesmos ids aparecem duas vezes
+        repetidos = [
+            log_archive._serializar(Log(id=f"old-{i}", acao="retirou", item_codigo="FER-001", timestamp=ts))
+            for i, ts in enumerate(ANTIGOS[:2])
+        ]
+        log_archive._append("2025-01", repetidos)
+
+    asyncio.run(preparar())
+
+
+def _paginar(client, limit: int) -> list[str]:
+    ids, cursor = [], None
+    while True:
+        url = f"/api/logs?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        r = client.get(url)
+        assert r.status_code == 200
+        ids += [log["id"] for log in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+
+
+def test_paginacao_atravessa_tabela_e_arquivo(client, arquivo):
+    esperado = ["new-0", "new-1", "old-4", "old-3", "old-2", "old-1", "old-0"]
+    assert _paginar(client, 2) == esperado
+    assert _paginar(client, 3) == esperado
+    assert [log["id"] for log in client.get("/api/logs").json()] == esperado
+
+
+def test_listagem_sem_limit_vem_paginada(client, arquivo, session_factory):
+    agora = utcnow()
+
+    async def preencher():
+        async with session_factory() as db:
+            for i in range(logs_router.LOGS_PAGE_SIZE):
+                db.add(Log(id=f"mais-{i:03d}", acao="retirou", item_codigo="FER-002", timestamp=agora - timedelta(minutes=i + 1)))
+            await db.commit()
+
+    asyncio.run(preencher())
+    r = client.get("/api/logs")
+    assert len(r.json()) == logs_router.LOGS_PAGE_SIZE
+    resto = client.get(f"/api/logs?cursor={r.headers['X-Next-Cursor']}")
+    assert [log["id"] for log in resto.json()][-5:] == ["old-4", "old-3", "old-2", "old-1", "old-0"]
+    assert "X-Next-Cursor" not in resto.headers
+
+
+def test_arquivo_nao_e_lido_quando_a_tabela_fecha_a_pagina(client, arquivo, monkeypatch):
+    def proibido(*args):
+        raise AssertionError("leu o arquivo")
+
+    monkeypatch.setattr(logs_router, "read_archive", proibido)
+    assert [log["id"] for log in client.get("/api/logs?limit=1").json()] == ["new-0"]
+    desde = (utcnow() - timedelta(days=1)).isoformat()
+    assert len(client.get(f"/api/logs?from={desde}").json()) == 2
+
+
+def test_segmento_sumido_nao_derruba_a_listagem(client, arquivo):
+    log_archive._segmento("2025-02").unlink()
+    assert [log["id"] for log in client.get("/api/logs").json()] == ["new-0", "new-1", "old-1", "old-0"]
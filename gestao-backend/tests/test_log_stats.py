@@ -0,0 +1,82 @@
+import asyncio
+
+from sqlalchemy import select
+
+from app.audit_log import audit_log
+from app.models.item import Item
+from app.models.log_rollup import LogRollup
+from app.routers import sheets
+from app.schemas.sheet_row import SheetRowResponse
+
+
+def _vezes_usado(session_factory, codigo: str) -> int:
+    async def ler():
+        async with session_factory() as db:
+            return (await db.execute(select(Item.vezes_usado).where(Item.codigo == codigo))).scalar()
+
+    return asyncio.run(ler()) or 0
+
+
+def _rollups(session_factory) -> int:
+    async def ler():
+        async with session_factory() as db:
+            return sum((await db.execute(select(LogRollup.total))).scalars().all())
+
+    return asyncio.run(ler())
+
+
+def test_stats_vazio_e_filtro_sem_resultado(client):
+    assert client.get("/api/logs/stats?bucket=total").json() == []
+    assert client.get("/api/logs/stats").json() == []
+
+    client.post("/api/logs", json={"acao": "retirou", "item_codigo": "FER-001"})
+    assert client.get("/api/logs/stats?bucket=total&acao=nenhuma").json() == []
+    assert client.get("/api/logs/stats?bucket=total&group_by=acao&item_codigo=OUTRO").json() == []
+
+
+def test_stats_filtrado(client):
+    for acao, item in (("retirou", "FER-001"), ("retirou", "FER-001"), ("devolveu", "FER-001"), ("retirou", "FER-002")):
+        assert client.post("/api/logs", json={"acao": acao, "item_codigo": item}).status_code == 201
+
+    r = client.get("/api/logs/stats?bucket=total&acao=retirou&group_by=item_codigo").json()
+    assert [(s["item_codigo"], s["total"]) for s in r] == [("FER-001", 2), ("FER-002", 1)]
+    r = client.get("/api/logs/stats?bucket=total&item_codigo=FER-001").json()
+    assert [s["total"] for s in r] == [3]
+
+
+def test_flush_da_auditoria_conta_uma_vez(client, session_factory):
+    client.post("/api/items", json={"codigo": "FER-001", "nome": "Furadeira"})
+    antes = _rollups(session_factory)
+
+    async def gravar():
+        audit_log.mode = "async"
+        try:
+            await audit_log.record(acao="retirou", item_codigo="FER-001")
+            await audit_log.record(acao="retirou", item_codigo="FER-001")
+            assert await audit_log.flush() == 2
+            assert await audit_log.flush() == 0
+        finally:
+            audit_log.mode = "sync"
+
+    asyncio.run(gravar())
+    assert _vezes_usado(session_factory, "FER-001") == 2
+    assert _rollups(session_factory) - antes == 2
+
+
+def test_importacao_da_planilha_conta_uma_vez(client, session_factory, monkeypatch):
+    client.post("/api/items", json={"codigo": "FER-001", "nome": "Furadeira"})
+    planilha = [SheetRowResponse(id="1", data="2026-03-02", descricao="Tinta", categoria="Compras", valor=80.0)]
+
+    async def fetch_rows():
+        return list(planilha)
+
+    monkeypatch.setattr(sheets, "_fetch_rows", fetch_rows)
+    assert client.post("/api/logs/sync-sheet").json()["created"] == 1
+    # planilha mudou: só o lançamento novo entra, o antigo esbarra no source_key
+    planilha.append(SheetRowResponse(id="2", data="2026-03-03", descricao="Pincel", categoria="Compras", valor=12.0))
+    assert client.post("/api/logs/sync-sheet").json() == {"created": 1, "skipped": 1, "not_modified": False}
+
+    r = client.get("/api/logs/stats?bucket=total&acao=compra_realizada").json()
+    assert [s["total"] for s in r] == [2]
+    # lançamentos financeiros não são uso de item
+    assert _vezes_usado(session_factory, "FER-001") == 0
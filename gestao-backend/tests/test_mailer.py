@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+from sqlalchemy import select
+
+from app import mailer as modulo
+from app.mailer import MailWorker, enqueue_email
+from app.models.outbound_email import OutboundEmail
+
+
+def _erro(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.resend.com/emails/batch")
+    return httpx.HTTPStatusError("erro", request=request, response=httpx.Response(status, request=request))
+
+
+class _Transport:
+    """Recusa com `status` qualquer envio que inclua um endereço "ruim"."""
+
+    def __init__(self, session_factory, status: int):
+        self.session_factory = session_factory
+        self.status = status
+        self.sent: list[str] = []
+        self.vistos_durante_envio: list[str] = []
+
+    async def send(self, messages):
+        async with self.session_factory() as db:
+            result = await db.execute(select(OutboundEmail.status))
+            self.vistos_durante_envio += result.scalars().all()
+        if any(m["to"][0].startswith("ruim") for m in messages):
+            raise _erro(self.status)
+        self.sent += [m["to"][0] for m in messages]
+
+
+def _enfileirar(session_factory, *destinos: str) -> None:
+    async def enfileirar():
+        async with session_factory() as db:
+            for to in destinos:
+                enqueue_email(db, to=to, subject="Oi", html="<p>link</p>")
+            await db.commit()
+
+    asyncio.run(enfileirar())
+
+
+def _situacao(session_factory) -> dict[str, tuple]:
+    async def ler():
+        async with session_factory() as db:
+            result = await db.execute(select(OutboundEmail.para, OutboundEmail.status, OutboundEmail.tentativas))
+            return {para: (status, tentativas) for para, status, tentativas in result.all()}
+
+    return asyncio.run(ler())
+
+
+def test_endereco_invalido_nao_derruba_o_lote(session_factory, monkeypatch):
+    monkeypatch.setattr(modulo, "MAIL_RATE_PER_SECOND", 1000)
+    transport = _Transport(session_factory, 422)
+    worker = MailWorker(transport, session_factory)
+    _enfileirar(session_factory, "ana@x", "ruim@x", "bia@x")
+
+    assert asyncio.run(worker.flush()) == 2
+    assert sorted(transport.sent) == ["ana@x", "bia@x"]
+    assert _situacao(session_factory) == {
+        "ana@x": ("enviado", 1), "bia@x": ("enviado", 1), "ruim@x": ("falhou", 1),
+    }
+    # a reserva foi gravada antes do envio, fora da transação do SELECT
+    assert set(transport.vistos_durante_envio) == {"enviando"}
+
+
+def test_falha_transitoria_volta_para_a_fila(session_factory, monkeypatch):
+    monkeypatch.setattr(modulo, "MAIL_RATE_PER_SECOND", 1000)
+    worker = MailWorker(_Transport(session_factory, 503), session_factory)
+    _enfileirar(session_factory, "ana@x", "ruim@x")
+
+    assert asyncio.run(worker.flush()) == 0
+    assert _situacao(session_factory) == {"ana@x": ("pendente", 1), "ruim@x": ("pendente", 1)}
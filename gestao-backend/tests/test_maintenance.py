@@ -0,0 +1,58 @@
+import asyncio
+from datetime import date, datetime, time, timedelta, timezone
+
+from app.maintenance import ACAO_MANUTENCAO, alert_due, parse_ciclo, roll_forward
+from app.models.alert import Alert
+from app.models.item import Item
+from app.models.log import Log
+from app.pagination import utcnow
+
+
+def test_parse_ciclo_ignora_acentos():
+    assert parse_ciclo("Mensal") == timedelta(days=30)
+    assert parse_ciclo("a cada 1 mês") == timedelta(days=30)
+    assert parse_ciclo("Revisão semestral") == timedelta(days=182)
+    assert parse_ciclo("DIÁRIO") == timedelta(days=1)
+    assert parse_ciclo("2 anos") == timedelta(days=730)
+    assert parse_ciclo("quando der") is None
+
+
+def test_roll_forward_preserva_proxima_acertada_a_mao(session_factory):
+    async def cenario():
+        async with session_factory() as db:
+            item = Item(codigo="BOM-001", nome="Bomba d'água", ciclo_manutencao="mensal")
+            db.add(item)
+            db.add(Log(item_codigo="BOM-001", acao=ACAO_MANUTENCAO, timestamp=datetime(2026, 1, 10, tzinfo=timezone.utc)))
+            await db.commit()
+
+            assert await roll_forward(db) == 1
+            assert (item.ultima_manutencao, item.proxima_manutencao) == (date(2026, 1, 10), date(2026, 2, 9))
+
+            item.proxima_manutencao = date(2026, 3, 1)
+            await db.commit()
+            assert await roll_forward(db) == 0
+            assert item.proxima_manutencao == date(2026, 3, 1)
+
+            # manutenção nova: volta a valer o ciclo
+            db.add(Log(item_codigo="BOM-001", acao=ACAO_MANUTENCAO, timestamp=datetime(2026, 2, 5, tzinfo=timezone.utc)))
+            await db.commit()
+            assert await roll_forward(db) == 1
+            assert (item.ultima_manutencao, item.proxima_manutencao) == (date(2026, 2, 5), date(2026, 3, 7))
+
+    asyncio.run(cenario())
+
+
+def test_alert_due_um_por_dia_utc(session_factory):
+    inicio_do_dia = datetime.combine(utcnow().date(), time.min)
+
+    async def cenario():
+        async with session_factory() as db:
+            db.add(Item(codigo="BOM-001", nome="Bomba d'água", proxima_manutencao=utcnow().date() - timedelta(days=1)))
+            db.add(Alert(tipo="manutencao", titulo="ontem", created_at=inicio_do_dia - timedelta(seconds=1)))
+            await db.commit()
+
+            assert await alert_due(db) == 1
+            await db.commit()
+            assert await alert_due(db) == 0
+
+    asyncio.run(cenario())
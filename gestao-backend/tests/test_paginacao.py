@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.enquete import Enquete
+from app.models.enquete_comentario import EnqueteComentario
+from app.routers.enquetes import COMENTARIOS_PAGE_SIZE, ENQUETES_PAGE_SIZE
+
+
+def _criar_enquetes(session_factory, n: int) -> None:
+    async def criar():
+        async with session_factory() as db:
+            inicio = datetime(2026, 1, 1)
+            for i in range(n):
+                db.add(Enquete(titulo=f"E{i}", opcoes=["A", "B"], created_at=inicio + timedelta(minutes=i)))
+            await db.commit()
+
+    asyncio.run(criar())
+
+
+def test_listagem_de_enquetes_sempre_pagina(client, session_factory):
+    _criar_enquetes(session_factory, ENQUETES_PAGE_SIZE + 3)
+    for url in ("/api/enquetes", "/api/enquetes/summary"):
+        r = client.get(url)
+        assert len(r.json()) == ENQUETES_PAGE_SIZE
+        resto = client.get(f"{url}?cursor={r.headers['X-Next-Cursor']}")
+        assert [e["titulo"] for e in resto.json()] == ["E2", "E1", "E0"]
+        assert "X-Next-Cursor" not in resto.headers
+
+
+def test_comentarios_sempre_paginam(client, session_factory):
+    enquete_id = client.post("/api/enquetes", json={"titulo": "Horta", "opcoes": ["A", "B"]}).json()["id"]
+
+    async def comentar():
+        async with session_factory() as db:
+            inicio = datetime(2026, 1, 1)
+            for i in range(COMENTARIOS_PAGE_SIZE + 2):
+                db.add(EnqueteComentario(
+                    enquete_id=enquete_id, autor="ana", conteudo=f"c{i}", created_at=inicio + timedelta(minutes=i),
+                ))
+            await db.commit()
+
+    asyncio.run(comentar())
+    r = client.get(f"/api/enquetes/{enquete_id}/comentarios")
+    assert len(r.json()) == COMENTARIOS_PAGE_SIZE
+    resto = client.get(f"/api/enquetes/{enquete_id}/comentarios?cursor={r.headers['X-Next-Cursor']}")
+    assert [c["conteudo"] for c in resto.json()] == [f"c{COMENTARIOS_PAGE_SIZE}", f"c{COMENTARIOS_PAGE_SIZE + 1}"]
@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from jose import jwt
+
+from app import supabase_auth
+
+
+def _token(iat: float) -> str:
+    claims = {
+        "sub": "u-1", "email": "ana@x", "aud": "authenticated",
+        "iss": supabase_auth.issuer(), "iat": int(iat), "exp": int(time.time()) + 3600,
+    }
+    return jwt.encode(claims, "segredo", algorithm="HS256")
+
+
+def test_token_novo_e_aceito_localmente_ate_o_intervalo(monkeypatch):
+    monkeypatch.setattr(supabase_auth, "SUPABASE_URL", "https://proj.supabase.co")
+    monkeypatch.setattr(supabase_auth, "SUPABASE_ANON_KEY", "anon")
+    monkeypatch.setattr(supabase_auth, "SUPABASE_VERIFY_MODE", "local")
+    monkeypatch.setattr(supabase_auth, "SUPABASE_JWT_SECRET", "segredo")
+    monkeypatch.setattr(supabase_auth, "SUPABASE_REVALIDATE_SECONDS", 900)
+    chamadas = []
+
+    async def fetch_user(token):
+        chamadas.append(token)
+        return {"id": "u-1", "email": "ana@x", "user_metadata": {}}
+
+    monkeypatch.setattr(supabase_auth, "fetch_user", fetch_user)
+
+    novo = _token(time.time())
+    assert asyncio.run(supabase_auth.get_user(novo))["id"] == "u-1"
+    assert asyncio.run(supabase_auth.get_user(novo))["id"] == "u-1"
+    assert chamadas == []
+
+    # emitido há mais que o intervalo: confere no Supabase uma vez
+    antigo = _token(time.time() - 1000)
+    asyncio.run(supabase_auth.get_user(antigo))
+    asyncio.run(supabase_auth.get_user(antigo))
+    assert chamadas == [antigo]
@@ -0,0 +1,102 @@
+import asyncio
+
+from app.apuracao import apurar, migrar_votos_legado
+from app.models.enquete import Enquete
+from app.models.profile import Profile
+from app.routers.auth import get_current_user
+from app.main import app
+
+
+def _enquete_legada(session_factory, **extra) -> str:
+    async def criar():
+        async with session_factory() as db:
+            campos = {
+                "titulo": "Pintar a casa",
+                "tipo": "binaria",
+                "opcoes": ["Sim", "Não"],
+                "votos": {"0": 2, "1": 1},
+                "votantes": {"bolinha-a": [0], "bolinha-b": [0], "bolinha-c": [1]},
+                "total_votos": 3,
+                "status": "votacao",
+            }
+            enquete = Enquete(**{**campos, **extra})
+            db.add(enquete)
+            await db.commit()
+            return enquete.id
+
+    return asyncio.run(criar())
+
+
+def _obter(client, enquete_id: str) -> dict:
+    return next(e for e in client.get("/api/enquetes").json() if e["id"] == enquete_id)
+
+
+def _migrar(session_factory, forcar: bool = False) -> int:
+    async def rodar():
+        async with session_factory() as db:
+            conn = await db.connection()
+            copiados = await migrar_votos_legado(conn, forcar)
+            await db.commit()
+            return copiados
+
+    return asyncio.run(rodar())
+
+
+def test_migracao_e_idempotente_e_apura_votos_legados(session_factory):
+    enquete_id = _enquete_legada(session_factory)
+
+    assert _migrar(session_factory) == 3
+    assert _migrar(session_factory) == 0
+    assert _migrar(session_factory, forcar=True) == 0
+
+    async def apuracao():
+        async with session_factory() as db:
+            enquete = await db.get(Enquete, enquete_id)
+            return (await apurar(db, [enquete]))[enquete_id]
+
+    resultado = asyncio.run(apuracao())
+    assert resultado.votos == {"0": 2, "1": 1}
+    assert resultado.votantes_count == 3
+
+
+def test_bolinha_que_votou_no_legado_nao_vota_de_novo(session_factory, client):
+    enquete_id = _enquete_legada(session_factory)
+    _migrar(session_factory)
+    app.dependency_overrides[get_current_user] = lambda: Profile(slug="ana", cota_slug="bolinha-a")
+
+    r = client.post(f"/api/enquetes/{enquete_id}/votar", json={"opcao_index": 1})
+    assert r.status_code == 409
+
+    app.dependency_overrides[get_current_user] = lambda: Profile(slug="bia", cota_slug="bolinha-d")
+    r = client.post(f"/api/enquetes/{enquete_id}/votar", json={"opcao_index": 1})
+    assert r.status_code == 200
+    assert r.json()["votos"] == {"0": 2, "1": 2}
+
+
+def test_migracao_roda_uma_vez_e_traz_respostas(session_factory, client):
+    assert _migrar(session_factory) == 0
+    # enquete legada que aparece depois da marca: só o forcar copia
+    enquete_id = _enquete_legada(
+        session_factory, tipo="texto", opcoes=[], votos={}, votantes={}, total_votos=0, respostas={"bolinha-a": "Mais sombra", "bolinha-b": "Bancos"},
+    )
+    assert _migrar(session_factory) == 0
+    assert _obter(client, enquete_id)["respostas"] == {}
+
+    _migrar(session_factory, forcar=True)
+    r = _obter(client, enquete_id)
+    assert r["respostas"] == {"bolinha-a": "Mais sombra", "bolinha-b": "Bancos"}
+    assert r["votantes_count"] == 2
+
+
+def test_respostas_de_bolinhas_diferentes_nao_se_sobrescrevem(session_factory, client):
+    enquete_id = client.post(
+        "/api/enquetes", json={"titulo": "O que falta na praça?", "tipo": "texto", "opcoes": []}
+    ).json()["id"]
+    for slug, cota, texto in (("ana", "bolinha-a", "Sombra"), ("bia", "bolinha-b", "Bancos")):
+        app.dependency_overrides[get_current_user] = lambda slug=slug, cota=cota: Profile(slug=slug, cota_slug=cota)
+        assert client.post(f"/api/enquetes/{enquete_id}/responder", json={"texto": texto}).status_code == 200
+
+    r = client.post(f"/api/enquetes/{enquete_id}/responder", json={"texto": "De novo"})
+    assert r.status_code == 409
+    respostas = _obter(client, enquete_id)["respostas"]
+    assert respostas == {"bolinha-a": "Sombra", "bolinha-b": "Bancos"}